@@ -0,0 +1,58 @@
+"""Compares utils.deepmerge against the previous deepcopy-everything
+implementation on nested contexts of different sizes.
+
+    PYTHONPATH="." python ./benchmarks/deepmerge.py
+"""
+
+from copy import deepcopy
+import timeit
+
+from src.utils import _deepmerge, deepmerge, deepmerge_into
+
+
+def copying_deepmerge(*dicts):
+    return _deepmerge(*map(deepcopy, dicts))
+
+
+def make_context(width, depth):
+    if depth == 0:
+        return {f"value_{i}": f"string value {i}" for i in range(width)}
+    return {f"node_{i}": make_context(width, depth - 1) for i in range(width)}
+
+
+SIZES = {
+    "small": (4, 2),
+    "medium": (8, 3),
+    "large": (12, 4),
+}
+
+# A typical update touches a single leaf of the context
+UPDATE = {"node_0": {"node_0": {"value_0": "updated"}}}
+
+
+def run(number=20):
+    print(f"{'size':<8}{'keys':>8}{'copying':>14}{'deepmerge':>14}{'into':>14}")
+    for name, (width, depth) in SIZES.items():
+        context = make_context(width, depth)
+        keys = width ** (depth + 1)
+        timings = [
+            min(timeit.repeat(lambda: func(context, UPDATE), number=number, repeat=3))
+            / number
+            for func in (copying_deepmerge, deepmerge)
+        ]
+        # deepmerge_into owns (modifies) its target so is given a fresh one each
+        # time, merged targets are kept alive so freeing them is not timed
+        targets = [make_context(width, depth) for _ in range(number)]
+        merged = []
+        timings.append(
+            timeit.timeit(
+                lambda: merged.append(deepmerge_into(targets.pop(), UPDATE)),
+                number=number,
+            )
+            / number
+        )
+        print(f"{name:<8}{keys:>8}" + "".join(f"{t * 1e6:>12.1f}us" for t in timings))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+"""Memory used per session, each session being a client sat on a screen
+of `COMPONENTS` components. Measured with the components built lazily (none
+are until they're needed) and eagerly (all of them, with their validators).
+
+    PYTHONPATH="." python ./benchmarks/memory.py
+"""
+
+import gc
+import json
+import tracemalloc
+
+from src.client import TestClient, WorkflowCache
+from src.server import MockServer, Methods
+
+COMPONENTS = 30
+SESSIONS = 1000
+
+
+def make_workflow(count):
+    components = {
+        f"field_{i}": {
+            "type": "input",
+            "label": f"Field {i}",
+            "validator": ["not_empty"],
+        }
+        for i in range(count)
+    }
+    components["submit_button"] = {
+        "type": "button",
+        "action": "submit",
+        "style": "primary",
+        "text": "Submit",
+    }
+    return json.dumps(
+        {
+            "validators": {
+                "not_empty": {
+                    "type": "isLength",
+                    "message": {"type": "error", "template": "Required"},
+                    "validator_value": 1,
+                }
+            },
+            "components": components,
+            "flows": {
+                "Memory": {
+                    "tasks": [
+                        {
+                            "type": "screen",
+                            "name": "Fields",
+                            "components": [
+                                [{"name": name, "destination_path": f"$.{name}"}]
+                                for name in components
+                            ],
+                        }
+                    ],
+                    "config": {},
+                }
+            },
+            "starting_flow": "Memory",
+            "hash": f"memory-benchmark-{count}",
+            "context": {},
+        }
+    )
+
+
+def measure(server, cache, lazy_components):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = []
+    for _ in range(SESSIONS):
+        client = TestClient(
+            server,
+            "/workflow",
+            workflow_cache=cache,
+            lazy_components=lazy_components,
+        )
+        sessions.append((client, client.get_task()))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / SESSIONS
+
+
+def run():
+    server = MockServer()
+    workflow = make_workflow(COMPONENTS)
+    server.register_handler("/workflow", Methods.GET, lambda _: workflow)
+    cache = WorkflowCache()
+    # Load the shared workflow before measuring so only per session memory counts
+    TestClient(server, "/workflow", workflow_cache=cache).get_task()
+
+    print(f"{SESSIONS} sessions with {COMPONENTS + 1} components:")
+    for name, lazy_components in (("lazy", True), ("eager", False)):
+        used = measure(server, cache, lazy_components)
+        print(f"{name:<8}{used:>10.0f} bytes per session")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,95 @@
+"""Per interaction cost of a Screen as the number of components with
+preconditions grows.
+
+    PYTHONPATH="." python ./benchmarks/screen_click.py
+"""
+
+import json
+import timeit
+
+from src.client import TestClient
+from src.server import MockServer, Methods
+from src.validators import Validator
+
+COMPONENT_COUNTS = (10, 50, 100, 200)
+
+
+def make_workflow(count):
+    components = {
+        f"field_{i}": {"type": "input", "preconditions": [f"show_field_{i % 10}"]}
+        for i in range(count)
+    }
+    components["update_button"] = {
+        "type": "button",
+        "action": "update",
+        "style": "primary",
+        "text": "Update",
+    }
+    return json.dumps(
+        {
+            "validators": {
+                f"show_field_{i}": {
+                    "type": "isLength",
+                    "value_path": f"$.visibility.field_{i}",
+                    "validator_value": 0,
+                }
+                for i in range(10)
+            },
+            "components": components,
+            "flows": {
+                "Benchmark": {
+                    "tasks": [
+                        {
+                            "type": "screen",
+                            "name": "Fields",
+                            "components": [
+                                [{"name": name, "destination_path": f"$.{name}"}]
+                                for name in components
+                            ],
+                        }
+                    ],
+                    "config": {},
+                }
+            },
+            "starting_flow": "Benchmark",
+            "hash": f"screen-benchmark-{count}",
+            "context": {"visibility": {f"field_{i}": "shown" for i in range(10)}},
+        }
+    )
+
+
+def run(number=200):
+    print(f"{'components':<12}{'set':>12}{'click':>12}{'validations/click':>20}")
+    for count in COMPONENT_COUNTS:
+        server = MockServer()
+        server.register_handler(
+            "/workflow", Methods.GET, lambda _: make_workflow(count)
+        )
+        screen = TestClient(server, "/workflow").get_task()
+
+        set_time = (
+            min(
+                timeit.repeat(
+                    lambda: screen.set("field_0", "value"), number=number, repeat=3
+                )
+            )
+            / number
+        )
+        misses = Validator.cache_misses
+        click_time = (
+            min(
+                timeit.repeat(
+                    lambda: screen.click("update_button"), number=number, repeat=3
+                )
+            )
+            / number
+        )
+        validations = (Validator.cache_misses - misses) / (number * 3)
+        print(
+            f"{count:<12}{set_time * 1e6:>10.1f}us{click_time * 1e6:>10.1f}us"
+            f"{validations:>20.2f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,53 @@
+"""Head read latency of SparseStack against a plain Stack of full copies
+as the depth of the stack grows, each layer changes a single value.
+
+    PYTHONPATH="." python ./benchmarks/sparse_stack.py
+"""
+
+import timeit
+
+from src.stack import SparseStack, Stack
+from src.utils import deepmerge
+
+DEPTHS = (1, 8, 32, 128, 512)
+
+
+def make_context(width=20, depth=3):
+    if depth == 0:
+        return {f"value_{i}": f"string value {i}" for i in range(width)}
+    return {f"node_{i}": make_context(width, depth - 1) for i in range(width)}
+
+
+def build(stack_cls, depth, **kwargs):
+    context = make_context()
+    stack = stack_cls(context, **kwargs)
+    for layer in range(depth):
+        context = deepmerge(context, {"node_0": {"node_0": {"layer": layer}}})
+        stack = stack.push(context)
+    return stack
+
+
+def run(number=200):
+    print(f"{'depth':<8}{'Stack':>12}{'Sparse':>12}{'Sparse+upd':>12}")
+    for depth in DEPTHS:
+        stack = build(Stack, depth)
+        sparse = build(SparseStack, depth)
+        sparse.head  # Warm the layer caches
+
+        def read_after_update():
+            sparse.update({"node_1": {"value_0": "updated"}})
+            return sparse.head
+
+        timings = [
+            min(timeit.repeat(func, number=number, repeat=3)) / number
+            for func in (
+                lambda: stack.head,
+                lambda: sparse.head,
+                read_after_update,
+            )
+        ]
+        print(f"{depth:<8}" + "".join(f"{t * 1e6:>10.2f}us" for t in timings))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,237 @@
+"""Benchmarks of the client's hot paths across small, medium and large
+synthetic workflows and contexts.
+
+    PYTHONPATH="." python ./benchmarks/suite.py run --output before.json
+    PYTHONPATH="." python ./benchmarks/suite.py run --output after.json
+    PYTHONPATH="." python ./benchmarks/suite.py compare before.json after.json
+
+compare exits with a non-zero status if any benchmark got slower by more
+than --threshold (a fraction, 0.1 by default).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from src.client import TestClient, WorkflowCache
+from src.context import ExecutionContext
+from src.client import Repos
+from src.path import evaluator
+from src.server import MockServer, Methods
+from src.stack import SparseStack
+from src.templating import process_template
+from src.utils import deepmerge
+from src.validators import Validator
+
+SIZES = {
+    # components on a screen, (width, depth) of the context, stack depth
+    "small": (10, (4, 2), 8),
+    "medium": (50, (8, 3), 64),
+    "large": (200, (10, 4), 512),
+}
+
+jsonpath = evaluator()
+
+
+def make_context(width, depth):
+    if depth == 0:
+        return {f"value_{i}": f"string value {i}" for i in range(width)}
+    return {f"node_{i}": make_context(width, depth - 1) for i in range(width)}
+
+
+def deep_path(depth):
+    # Path to a leaf at the bottom of the context
+    return "$." + ".".join(["node_0"] * depth + ["value_0"])
+
+
+def make_workflow(count, context):
+    components = {
+        f"field_{i}": {"type": "input", "preconditions": ["is_shown"]}
+        for i in range(count)
+    }
+    components["update_button"] = {
+        "type": "button",
+        "action": "update",
+        "style": "primary",
+        "text": "Update",
+    }
+    return json.dumps(
+        {
+            "validators": {
+                "is_shown": {
+                    "type": "isLength",
+                    "value_path": "$.node_1.node_1",
+                    "validator_value": 0,
+                }
+            },
+            "components": components,
+            "flows": {
+                "Benchmark": {
+                    "tasks": [
+                        {
+                            "type": "screen",
+                            "name": "Fields",
+                            "components": [
+                                [{"name": name, "destination_path": f"$.{name}"}]
+                                for name in components
+                            ],
+                        }
+                    ],
+                    "config": {},
+                }
+            },
+            "starting_flow": "Benchmark",
+            "hash": f"suite-{count}-{len(context)}",
+            "context": context,
+        }
+    )
+
+
+def setup(size):
+    count, (width, depth), stack_depth = SIZES[size]
+    context = make_context(width, depth)
+    path = deep_path(depth)
+
+    server = MockServer()
+    workflow = make_workflow(count, context)
+    server.register_handler("/workflow", Methods.GET, lambda _: workflow)
+    client = TestClient(server, "/workflow", workflow_cache=WorkflowCache())
+    screen = client.get_task()
+
+    execution_context = ExecutionContext(
+        initial_state=context,
+        repos=Repos(
+            components={},
+            validators={
+                "length": {
+                    "type": "isLength",
+                    "value_path": path,
+                    "validator_value": 1,
+                }
+            },
+            flows={},
+        ),
+        event_handler=None,
+        history_handle=None,
+    )
+    validator = Validator("length", execution_context)
+    update = {"node_0": {"node_0": {"value_1": "updated"}}}
+
+    stack = SparseStack(context)
+    for layer in range(stack_depth):
+        stack = stack.push(deepmerge(context, {"node_1": {"layer": layer}}))
+
+    def validate_after_update():
+        execution_context.update_state({"node_0": {"value_0": time.perf_counter()}})
+        return validator.validate()
+
+    def sparse_head_after_update():
+        stack.update({"node_2": {"value_0": "updated"}})
+        return stack.head
+
+    template = "Hello {{" + path + "}}, {{" + path.replace("node_0", "node_1") + "}}!"
+
+    return {
+        "get_task": client.get_task,
+        "screen_set": lambda: screen.set("field_0", "value"),
+        "screen_click": lambda: screen.click("update_button"),
+        "deepmerge": lambda: deepmerge(context, update),
+        "jsonpath_get": lambda: jsonpath.get(context, path),
+        "jsonpath_set": lambda: jsonpath.set(context, path, "updated"),
+        "validator_validate": validator.validate,
+        "validator_validate_after_update": validate_after_update,
+        "process_template": lambda: process_template(template, context),
+        "sparse_stack_head": lambda: stack.head,
+        "sparse_stack_head_after_update": sparse_head_after_update,
+    }
+
+
+def time_benchmark(func, repeat=5, min_time=0.05):
+    number = 1
+    while (elapsed := timeit.timeit(func, number=number)) < min_time:
+        number *= 2 if elapsed else 10
+    timings = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+    return {
+        "number": number,
+        "min_us": min(timings) * 1e6,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+    }
+
+
+def run(sizes, only=None):
+    results = {}
+    for size in sizes:
+        for name, func in setup(size).items():
+            if only and name not in only:
+                continue
+            key = f"{name}.{size}"
+            results[key] = time_benchmark(func)
+            print(f"{key:<45}{results[key]['min_us']:>14.2f}us", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(base, new, threshold):
+    regressions = []
+    print(f"{'benchmark':<45}{'base':>12}{'new':>12}{'change':>10}")
+    for key in sorted(base["results"].keys() & new["results"].keys()):
+        before = base["results"][key]["min_us"]
+        after = new["results"][key]["min_us"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"{key:<45}{before:>10.2f}us{after:>10.2f}us{change:>+10.1%}{flag}")
+    for key in sorted(base["results"].keys() ^ new["results"].keys()):
+        print(f"{key:<45}only in {'base' if key in base['results'] else 'new'}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--output", "-o", help="JSON file to write results to")
+    run_parser.add_argument("--sizes", default=",".join(SIZES))
+    run_parser.add_argument("--only", help="comma separated benchmark names")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run(
+            args.sizes.split(","), only=set(args.only.split(",")) if args.only else None
+        )
+        output = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output)
+        else:
+            print(output)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    return 1 if compare(base, new, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Time and memory to load a large workflow and reach the first task with
+json_parser, lazy_json_parser and an already populated WorkflowStore, the
+workflow has `FLOWS` flows of which the session only visits the first.
+
+    PYTHONPATH="." python ./benchmarks/workflow_load.py
+"""
+
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+
+from src.client import TestClient, WorkflowCache
+from src.compiler import clear_cache
+from src.parser import json_parser, lazy_json_parser
+from src.server import MockServer, Methods
+from src.store import WorkflowStore
+
+FLOWS = 500
+COMPONENTS = 20
+
+
+def make_workflow(flow_count, component_count):
+    components = {
+        f"field_{i}": {
+            "type": "input",
+            "label": f"Field {i}",
+            "validator": ["not_empty"],
+        }
+        for i in range(flow_count * component_count)
+    }
+    flows = {
+        f"Flow_{f}": {
+            "tasks": [
+                {
+                    "type": "screen",
+                    "name": f"Screen_{f}",
+                    "components": [
+                        [{"name": name, "destination_path": f"$.{name}"}]
+                        for name in (
+                            f"field_{i}"
+                            for i in range(
+                                f * component_count, (f + 1) * component_count
+                            )
+                        )
+                    ],
+                }
+            ],
+            "config": {},
+        }
+        for f in range(flow_count)
+    }
+    return json.dumps(
+        {
+            "validators": {
+                "not_empty": {
+                    "type": "isLength",
+                    "message": {"type": "error", "template": "Required"},
+                    "validator_value": 1,
+                }
+            },
+            "components": components,
+            "flows": flows,
+            "starting_flow": "Flow_0",
+            "hash": f"load-benchmark-{flow_count}",
+            "context": {},
+        }
+    )
+
+
+def load(server, make_parser):
+    clear_cache()
+    gc.collect()
+    client = TestClient(
+        server,
+        "/workflow",
+        workflow_parser=make_parser(),
+        workflow_cache=WorkflowCache(),
+    )
+    client.get_task()
+    return client
+
+
+def measure(server, make_parser):
+    # Timed and traced separately as tracing slows down the python parts
+    # (scanning, compiling) far more than the json decoder
+    start = time.perf_counter()
+    load(server, make_parser)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    client = load(server, make_parser)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, used
+
+
+def run():
+    server = MockServer()
+    workflow = make_workflow(FLOWS, COMPONENTS)
+    server.register_handler("/workflow", Methods.GET, lambda _: workflow)
+    print(f"{len(workflow) / 1e6:.1f}MB workflow with {FLOWS} flows")
+    with tempfile.TemporaryDirectory() as directory:
+        # Populate the store as another worker process would have
+        WorkflowStore(directory)(workflow)
+        parsers = {
+            "json_parser": lambda: json_parser,
+            "lazy_json_parser": lambda: lazy_json_parser,
+            "WorkflowStore": lambda: WorkflowStore(directory),
+        }
+        print(f"{'parser':<20}{'first task':>12}{'memory':>12}")
+        for name, make_parser in parsers.items():
+            elapsed, used = measure(server, make_parser)
+            print(f"{name:<20}{elapsed * 1e3:>10.1f}ms{used / 1e6:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    run()
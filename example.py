@@ -191,3 +191,14 @@ t_old = t
 t = w.get_task()  # Reload flow
 assert t != t_old
 assert t.name == "InputMessage"
+
+# A snapshot taken after a click completes a screen restores the next task
+from src import snapshot
+
+t.set("input_Input message here", "Hello :)")
+t.click("submit_button")
+restored = snapshot.loads(s, snapshot.dumps(w))
+t = w.get_task()
+t_restored = restored.get_task()
+assert t.name == t_restored.name == "DisplayMessage"
+assert t_restored.get_messages() == {"HelloWorldMessage": "Hello :)"}
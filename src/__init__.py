@@ -1,10 +1,21 @@
 from . import registry
 from . import history
 from . import utils
+from . import frozen
 from . import path
 from . import stack
+from . import routing
 from . import exceptions
 from . import validators
 from . import components
+from . import response_cache
 from . import tasks
+from . import compiler
+from . import store
 from . import client
+from . import runner
+from . import explorer
+from . import instrumentation
+from . import snapshot
+from . import trace
+from . import replay
@@ -1,35 +1,110 @@
 from collections import namedtuple
+import inspect
 
-from .exceptions import InvalidEmptyStackOperation
-from .parser import json_parser
-from .stack import EmptyStack, Stack, VirtualStack
+from .exceptions import InvalidEmptyStackOperation, WorkflowNotPrefetched
+from .compiler import compile_workflow
+from .parser import json_parser, iter_workflow_paths
+from .path import evaluator
+from .stack import Stack, VirtualStack
 from .tasks import TASK_TYPES
+from .utils import LRUCache
 from .context import ExecutionContext
 from . import history
+from .trace import Recorder
 
-Repos = namedtuple("Repos", ("components", "validators", "flows"))
+Repos = namedtuple(
+    "Repos",
+    ("components", "validators", "flows", "response_cache", "lazy_components"),
+    defaults=(None, None),
+)
+CachedWorkflow = namedtuple("CachedWorkflow", ("raw_workflow", "parts"))
+
+
+def cache_entry(
+    raw_workflow, workflow_parser=json_parser, precompile_paths=False
+) -> CachedWorkflow:
+    parts = compile_workflow(workflow_parser(raw_workflow))
+    if precompile_paths:
+        # Loads (and so compiles) every entry of the lazily compiled
+        # workflow, rather than when each is first looked up
+        evaluator().precompile(
+            iter_workflow_paths((parts.components, parts.validators, parts.flows))
+        )
+    return CachedWorkflow(raw_workflow=raw_workflow, parts=parts)
+
+
+class WorkflowCache(LRUCache):
+    """URL keyed cache of fetched and compiled workflows, pass the same
+    instance to several clients to share it between them"""
+
+    def __init__(self, maxsize=32):
+        super().__init__(maxsize=maxsize)
 
 
 class TestClient:
-    def __init__(self, mock_server, workflow_url, workflow_parser=json_parser):
+    def __init__(
+        self,
+        mock_server,
+        workflow_url,
+        workflow_parser=json_parser,
+        precompile_paths=False,
+        workflow_cache=None,
+        history_depth=None,
+        history_bytes=None,
+        record=False,
+        response_cache=None,
+        lazy_components=None,
+    ):
         self._server = mock_server
         self._parser = workflow_parser
+        self._workflow_cache = (
+            WorkflowCache() if workflow_cache is None else workflow_cache
+        )
+        self._precompile_paths = precompile_paths
+        self._response_cache = response_cache
+        self._lazy_components = lazy_components
+        self._history_options = {
+            "max_depth": history_depth,
+            "max_bytes": history_bytes,
+        }
         self._interupt_tasks = set()
+        self._recorder = Recorder(workflow_url) if record else None
         self._load_workflow(workflow_url)
 
+    def _fetch_workflow(self, url):
+        raw_workflow = self._server.get(url)
+        if inspect.isawaitable(raw_workflow):
+            # Workflows are loaded synchronously, with an async server they
+            # have to be in the workflow cache before they're needed
+            if inspect.iscoroutine(raw_workflow):
+                raw_workflow.close()
+            raise WorkflowNotPrefetched(
+                f"{url} returned an awaitable, workflows from an async server "
+                "must be prefetched into the workflow cache (see "
+                "SessionRunner's prefetch_urls)"
+            )
+        return cache_entry(raw_workflow, self._parser, self._precompile_paths)
+
     def _load_workflow(self, url):
-        self.raw_workflow = self._server.get(url)
-        self._initialise_flow(self._parser(self.raw_workflow))
+        # Redirects usually point back at an already loaded workflow, in which
+        # case only the per session state (stacks and contexts) is rebuilt
+        workflow = self._workflow_cache.get_or_create(url, self._fetch_workflow)
+        self.workflow_url = url
+        self.raw_workflow = workflow.raw_workflow
+        self._initialise_flow(workflow.parts)
 
     def _initialise_flow(self, parts):
+        self._workflow_parts = parts
         self._starting_flow = parts.starting_flow
-        self._history_stack = VirtualStack(EmptyStack())
+        self._history_stack = history.HistoryStack(**self._history_options)
         self._initial_context = ExecutionContext(
             initial_state=parts.context,
             repos=Repos(
                 components=parts.components,
                 validators=parts.validators,
                 flows=parts.flows,
+                response_cache=self._response_cache,
+                lazy_components=self._lazy_components,
             ),
             event_handler=self._handle_event,
             history_handle=self._history_stack,
@@ -51,15 +126,30 @@ class TestClient:
             self._history_stack.push(
                 history.Entry(execution_context=data["execution_context"])
             )
+        if type == "interaction" and self._recorder is not None:
+            self._recorder.interaction(**data)
+
+    @property
+    def trace(self):
+        """The trace of the session so far, requires the client to be created
+        with record=True"""
+        if self._recorder is None:
+            raise ValueError("Client is not recording, pass record=True")
+        return self._recorder.trace()
 
     def set_task_breakpoint(self, task_name):
+        if self._recorder is not None:
+            self._recorder.breakpoint(task_name)
         self._interupt_tasks.add(task_name)
 
     def get_task(self):
         while True:  # Keep doing up the call stack until we reach the end
             try:
                 context = self.context_stack.get_head()
-                return context.flow.get_task(self._interupt_tasks)
+                task = context.flow.get_task(self._interupt_tasks)
+                if self._recorder is not None:
+                    self._recorder.visit(task)
+                return task
             except StopIteration as s:
                 if context == self._initial_context:
                     self._initial_context.stop()
@@ -0,0 +1,105 @@
+"""Compiles a parsed workflow into a resolved, immutable form.
+
+Screens get their component lookups resolved against the component repo,
+validators are named and every jsonpath and template is compiled. Each
+component, validator and flow is compiled when it is first looked up (a flow
+when it is first entered) so sessions only pay for the parts of the workflow
+they visit. Compiled workflows are cached by the workflow's "hash" so every
+client (and every redirect) running the same workflow shares one copy.
+Each compiled workflow keeps its source document alive (its entries are
+compiled from it on lookup) so only the most recently used are kept.
+"""
+
+from .frozen import freeze
+from .parser import PATH_KEYS, LazyMapping, ParseResult
+from .path import compile_path
+from .templating import compile_template
+from .utils import LRUCache
+
+_compiled = LRUCache(maxsize=32)
+
+
+def _compile_paths(node):
+    if isinstance(node, dict):
+        return {
+            key: (
+                compile_path(value)
+                if key in PATH_KEYS and isinstance(value, str)
+                else _compile_paths(value)
+            )
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_compile_paths(value) for value in node]
+    return node
+
+
+def _precompile_templates(node):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "template" and isinstance(value, str):
+                compile_template(value)
+            else:
+                _precompile_templates(value)
+    elif isinstance(node, (list, tuple)):
+        for value in node:
+            _precompile_templates(value)
+
+
+def _resolve_screen(task, components):
+    return task | {
+        "resolved_components": [
+            [components[lookup["name"]] | lookup for lookup in row]
+            for row in task["components"]
+        ]
+    }
+
+
+def _compile_flow(flow, components):
+    return flow | {
+        "tasks": [
+            _resolve_screen(task, components) if task["type"] == "screen" else task
+            for task in flow["tasks"]
+        ]
+    }
+
+
+def _compile_node(node):
+    node = _compile_paths(node)
+    _precompile_templates(node)
+    return freeze(node)
+
+
+def _lazy(mapping, func):
+    if isinstance(mapping, LazyMapping):
+        return mapping.map(func)
+    return LazyMapping(mapping, lambda key: func(key, mapping[key]))
+
+
+def _compile_workflow(parts: ParseResult) -> ParseResult:
+    components = _lazy(parts.components, lambda name, config: _compile_node(config))
+    validators = _lazy(
+        parts.validators, lambda name, config: _compile_node(config | {"name": name})
+    )
+    flows = _lazy(
+        parts.flows,
+        lambda name, flow: freeze(_compile_flow(_compile_node(flow), components)),
+    )
+    return ParseResult(
+        components=components,
+        validators=validators,
+        flows=flows,
+        starting_flow=parts.starting_flow,
+        context=freeze(parts.context),
+        hash=parts.hash,
+    )
+
+
+def compile_workflow(parts: ParseResult) -> ParseResult:
+    if parts.hash is None:
+        return _compile_workflow(parts)
+    return _compiled.get_or_create(parts.hash, lambda key: _compile_workflow(parts))
+
+
+def clear_cache():
+    _compiled.clear()
@@ -1,9 +1,11 @@
 from collections import namedtuple
+import sys
 from typing import Any, Optional
 from .context import ExecutionContext
 from .validators import Validator
 from .exceptions import CantClickDisabled
 from .path import evaluator
+from .templating import process_template
 
 __all__ = ("COMPONENTS", "Component")
 
@@ -13,6 +15,15 @@ jsonpath = evaluator()
 
 
 class Component:
+    __slots__ = [
+        "name",
+        "task_type",
+        "destination_path",
+        "add_event",
+        "preconditions",
+        "_execution_context",
+    ]
+
     _is_value_component = False
     _is_button = False
 
@@ -28,11 +39,13 @@ class Component:
         self.name: str = name
         self.task_type: str = type
         self.destination_path: str = destination_path
-        self.preconditions: list[Validator] = (
-            [self._process_validator(p) for p in preconditions] if preconditions else []
-        )
         self.add_event = add_event
         self._execution_context = execution_context
+        self.preconditions: tuple[Validator, ...] = (
+            tuple(self._process_validator(p) for p in preconditions)
+            if preconditions
+            else ()
+        )
 
     def _process_validator(self, validator: str):
         return Validator(
@@ -44,17 +57,17 @@ class Component:
     def _get_value(self, validator: Validator, context: dict):
         return validator.get_value(context=context, component=self)
 
-    def _eval_validators(self, context, validators: list[Validator]):
-        return all(
-            validator.validate(component=self, context=context)
-            for validator in validators
-        )
+    def _eval_validators(self, validators: tuple[Validator, ...]):
+        return all(validator.validate() for validator in validators)
 
     def validate(self) -> None:
         pass
 
+    def failing_validators(self) -> tuple[Validator, ...]:
+        return ()
+
     def show(self):
-        return self._eval_validators(self._execution_context.state, self.preconditions)
+        return self._eval_validators(self.preconditions)
 
     @property
     def is_value_component(self):
@@ -66,28 +79,36 @@ class Component:
 
 
 class ValueComponent(Component):
+    __slots__ = ["validators", "_value", "_errors"]
+
     _value: Any
     _is_value_component = True
 
     def __init__(self, execution_context, validator=None, **kwargs):
         super().__init__(execution_context=execution_context, **kwargs)
         if validator:
-            self.validators = [self._process_validator(v) for v in validator]
+            self.validators = tuple(self._process_validator(v) for v in validator)
         else:
-            self.validators = []
+            self.validators = ()
         self._value = None
-        self._errors = []
+        self._errors = ()
 
     @property
     def errors(self):
-        return self._errors.copy()
+        return list(self._errors)
 
     def validate(self) -> None:
-        self._errors.clear()
-        for validator in self.validators:
-            if not validator.validate():
-                msg = validator.get_message()
-                self._errors.append(msg)
+        self._errors = tuple(
+            validator.get_message() for validator in self.failing_validators()
+        )
+
+    def failing_validators(self) -> tuple[Validator, ...]:
+        return tuple(
+            validator for validator in self.validators if not validator.validate()
+        )
+
+    def set_errors(self, errors) -> None:
+        self._errors = tuple(errors)
 
     def get_value(self) -> Any:
         return self._value
@@ -103,10 +124,21 @@ class ValueComponent(Component):
 
 
 class Textbox(Component):
-    pass
+    __slots__ = []
 
 
 class Input(ValueComponent):
+    __slots__ = [
+        "component_type",
+        "label",
+        "input_key",
+        "input_ref",
+        "output_ref",
+        "output",
+        "obscure",
+        "populate",
+    ]
+
     def __init__(
         self,
         component_type=None,
@@ -120,7 +152,9 @@ class Input(ValueComponent):
         **kwargs,
     ):
         super().__init__(**kwargs)
-        self.component_type = component_type or self.__class__.__name__.lower()
+        self.component_type = component_type or sys.intern(
+            self.__class__.__name__.lower()
+        )
         self.label = label or ""
         self.input_key = input_key
         self.input_ref = input_ref
@@ -131,10 +165,12 @@ class Input(ValueComponent):
 
 
 class DateTime(Input):
-    pass
+    __slots__ = []
 
 
 class Clickable(ValueComponent):
+    __slots__ = []
+
     def set_value(self, value: Any):
         raise NotImplementedError()
 
@@ -149,6 +185,16 @@ class Clickable(ValueComponent):
 
 
 class Button(Clickable):
+    __slots__ = [
+        "action",
+        "style",
+        "text",
+        "value",
+        "show_confirmation",
+        "load_values",
+        "disabling_validators",
+    ]
+
     _is_button = True
 
     def __init__(
@@ -170,11 +216,11 @@ class Button(Clickable):
         self.show_confirmation = show_confirmation
         self.load_values = load_values
         if disabling_validators:
-            self.disabling_validators = [
+            self.disabling_validators = tuple(
                 self._process_validator(v) for v in disabling_validators
-            ]
+            )
         else:
-            self.disabling_validators = []
+            self.disabling_validators = ()
 
     def disabled(self):
         return any(v.validate() for v in self.disabling_validators)
@@ -290,17 +336,23 @@ class DisplayData(Component):
 
 
 class MessageBox(Component):
+    __slots__ = ["template", "type", "size"]
+
     def __init__(self, message, size=None, **kwargs):
         super().__init__(**kwargs)
         self.template = message["template"]
         self.type = message["type"]
         self.size = size
 
+    def get_message(self, context=None) -> str:
+        if context is None:
+            context = self._execution_context.state
+        return process_template(self.template, context=context)
+
 
 class Toggle(Clickable):
     __slots__ = [
         "style",
-        "preconditions",
         "value",
         "label",
     ]
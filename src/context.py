@@ -1,9 +1,21 @@
-from copy import deepcopy
+from .frozen import freeze, merge, thaw
 from .registry import TASK_TYPES
-from .utils import deepmerge
 
 
 class ExecutionContext:
+    __slots__ = [
+        "_state",
+        "repos",
+        "_result",
+        "flow",
+        "task",
+        "_stack_handle",
+        "_event_handler",
+        "_history_handle",
+        "position",
+        "__weakref__",
+    ]
+
     def __init__(
         self,
         initial_state,
@@ -15,9 +27,9 @@ class ExecutionContext:
         task=None,
         position=0,
     ):
-        self._state = initial_state
+        self._state = freeze(initial_state)
         self.repos = repos
-        self._result = {}
+        self._result = freeze({})
         self.flow = flow
         self.task = task
         self._stack_handle = stack_handle
@@ -37,24 +49,32 @@ class ExecutionContext:
 
     @property
     def state(self):
-        return deepcopy(self._state)
+        # State is frozen so can be shared rather than copied,
+        # use get_state(mutable=True) if you need a plain dict
+        return self._state
+
+    def get_state(self, mutable=False):
+        return thaw(self._state) if mutable else self._state
 
     def update_state(self, update: dict):
-        self._state = deepmerge(self._state, update)
+        self._state = merge(self._state, update)
 
     def update_result(self, update: dict):
-        self._result = deepmerge(self._result, update)
+        self._result = merge(self._result, update)
 
     def merge_result_into_state(self):
-        self._state = deepmerge(self._state, self._result)
+        self._state = merge(self._state, self._result)
 
     @property
     def result(self):
-        return deepcopy(self._result)
+        return self._result
+
+    def get_result(self, mutable=False):
+        return thaw(self._result) if mutable else self._result
 
-    def new_context(self, position=0):
+    def new_context(self, position=0, initial_state=None):
         context = ExecutionContext(
-            initial_state=self.state,
+            initial_state=self.state if initial_state is None else initial_state,
             repos=self.repos,
             flow=self.flow,
             stack_handle=self._stack_handle,
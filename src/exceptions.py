@@ -4,3 +4,7 @@ class CantClickDisabled(Exception):
 
 class InvalidEmptyStackOperation(Exception):
     pass
+
+
+class WorkflowNotPrefetched(Exception):
+    pass
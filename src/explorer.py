@@ -0,0 +1,281 @@
+"""Explores every reachable path through a workflow.
+
+A search node is the list of steps taken from the start of the workflow.
+Clients can not be copied (flows are generators) so a node is expanded by
+replaying its steps on a fresh client, then forking once for each choice
+the current task offers: every visible button of a screen (for every
+combination of the configured input values), the response of a JsonRpc
+task and the reload of a Redirect. Nodes are deduplicated by a hash of the
+current task and context so loops (back buttons, redirects to the start)
+terminate. Expansions are spread across a process pool, as MockServers hold
+handlers which can't be pickled each worker builds its own server from
+`server_factory` which should be a module level function.
+"""
+
+import hashlib
+import itertools
+import json
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from .client import TestClient, WorkflowCache
+from .exceptions import InvalidEmptyStackOperation
+from .runner import Step
+from .tasks import JsonRpc, JsonRpcBatch, Redirect, Screen
+
+DEFAULT_INPUT_VALUE = "explorer"
+# State hash of every path which has completed the workflow
+COMPLETE = "complete"
+
+Child = namedtuple("Child", ("path", "state_hash", "task_name"))
+Expansion = namedtuple(
+    "Expansion", ("path", "state_hash", "task_name", "children", "failures")
+)
+ExplorationFailure = namedtuple("ExplorationFailure", ("path", "exception"))
+
+
+class ExplorationReport:
+    def __init__(
+        self, all_tasks, visited_tasks, edges, states, completed, failures, duration
+    ):
+        self.all_tasks = all_tasks
+        self.visited_tasks = visited_tasks
+        self.edges = edges
+        self.states = states
+        self.completed = completed
+        self.failures = failures
+        self.duration = duration
+
+    @property
+    def task_coverage(self):
+        return len(self.visited_tasks & self.all_tasks) / (len(self.all_tasks) or 1)
+
+    @property
+    def unvisited_tasks(self):
+        return self.all_tasks - self.visited_tasks
+
+    @property
+    def states_per_second(self):
+        return self.states / self.duration if self.duration else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.states} unique states in {self.duration:.3f}s "
+            f"({self.states_per_second:.1f} states/s)",
+            f"{len(self.completed)} paths completed the workflow, "
+            f"{len(self.failures)} failed",
+            f"task coverage {self.task_coverage:.0%} "
+            f"({len(self.visited_tasks & self.all_tasks)}/{len(self.all_tasks)})",
+        ]
+        if self.unvisited_tasks:
+            lines.append(f"unvisited tasks: {', '.join(sorted(self.unvisited_tasks))}")
+        for (task_name, choice), count in sorted(self.edges.items()):
+            lines.append(f"  {task_name} -> {choice}: {count}")
+        return "\n".join(lines)
+
+
+def _state_hash(client, task):
+    if task is None:
+        return COMPLETE
+    try:
+        context = client.context_stack.get_head()
+    except InvalidEmptyStackOperation:
+        return COMPLETE
+    return hashlib.sha1(
+        json.dumps(
+            [task.name, context.state, context.result],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+class _Worker:
+    def __init__(self, server_factory, workflow_url, input_values, breakpoints):
+        self._server = server_factory()
+        self._workflow_url = workflow_url
+        self._input_values = input_values
+        self._breakpoints = breakpoints
+        self._workflow_cache = WorkflowCache()
+
+    def _new_client(self):
+        client = TestClient(
+            self._server, self._workflow_url, workflow_cache=self._workflow_cache
+        )
+        for name in self._breakpoints:
+            client.set_task_breakpoint(name)
+        return client
+
+    def _apply(self, client, task, step):
+        if step.action == "jsonrpc":
+            task.set_result(self._server.post(task.get_endpoint(), task.get_payload()))
+        elif step.action != "redirect":
+            getattr(task, step.action)(*step.args)
+        return client.get_task()
+
+    def _replay(self, path):
+        client = self._new_client()
+        task = client.get_task()
+        for step in path:
+            task = self._apply(client, task, step)
+        return client, task
+
+    def _choices(self, task):
+        if isinstance(task, (JsonRpc, JsonRpcBatch)):
+            return [(Step(task.name, "jsonrpc"),)]
+        if isinstance(task, Redirect):
+            return [(Step(task.name, "redirect"),)]
+        if not isinstance(task, Screen):
+            return []
+        components = task.get_components()
+        inputs = [
+            name
+            for name, c in components.items()
+            if c.is_value_component and not c.is_button
+        ]
+        buttons = [
+            name for name, c in components.items() if c.is_button and not c.disabled()
+        ]
+        choices = []
+        for values in itertools.product(
+            *(self._input_values.get(name, [DEFAULT_INPUT_VALUE]) for name in inputs)
+        ):
+            sets = tuple(
+                Step(task.name, "set", (name, value))
+                for name, value in zip(inputs, values)
+            )
+            choices.extend(
+                sets + (Step(task.name, "click", (button,)),) for button in buttons
+            )
+        return choices
+
+    def expand(self, path):
+        client, task = self._replay(path)
+        state_hash = _state_hash(client, task)
+        if task is None:
+            return Expansion(path, state_hash, None, [], [])
+        children = []
+        failures = []
+        for choice in self._choices(task):
+            child_path = path + choice
+            try:
+                client, child_task = self._replay(path)
+                for step in choice:
+                    child_task = self._apply(client, child_task, step)
+                children.append(
+                    Child(
+                        path=child_path,
+                        state_hash=_state_hash(client, child_task),
+                        task_name=child_task.name if child_task else None,
+                    )
+                )
+            except Exception as e:
+                failures.append(ExplorationFailure(child_path, e))
+        return Expansion(path, state_hash, task.name, children, failures)
+
+
+_worker = None
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _expand(path):
+    return _worker.expand(path)
+
+
+class WorkflowExplorer:
+    def __init__(
+        self,
+        server_factory,
+        workflow_url,
+        input_values=None,
+        max_depth=100,
+        processes=None,
+    ):
+        self._server_factory = server_factory
+        self._workflow_url = workflow_url
+        self._input_values = input_values or {}
+        self._max_depth = max_depth
+        self._processes = processes
+
+    def _workflow_tasks(self):
+        client = TestClient(self._server_factory(), self._workflow_url)
+        flows = client._initial_context.repos.flows
+        return {
+            task["name"]: task["type"]
+            for flow in flows.values()
+            for task in flow["tasks"]
+        }
+
+    def explore(self) -> ExplorationReport:
+        start = perf_counter()
+        workflow_tasks = self._workflow_tasks()
+        breakpoints = {n for n, t in workflow_tasks.items() if t == "redirect"}
+        init_args = (
+            self._server_factory,
+            self._workflow_url,
+            self._input_values,
+            breakpoints,
+        )
+
+        visited_tasks = set()
+        edges = {}
+        completed = []
+        failures = []
+        seen = set()
+        frontier = [()]
+
+        if self._processes == 0:
+            _init_worker(*init_args)
+            pool = None
+            map_ = map
+        else:
+            pool = ProcessPoolExecutor(
+                self._processes, initializer=_init_worker, initargs=init_args
+            )
+            map_ = lambda f, paths: pool.map(f, paths, chunksize=8)
+
+        try:
+            while frontier:
+                next_frontier = []
+                for expansion in map_(_expand, frontier):
+                    failures.extend(expansion.failures)
+                    seen.add(expansion.state_hash)
+                    if expansion.task_name is None:
+                        completed.append(expansion.path)
+                        continue
+                    visited_tasks.add(expansion.task_name)
+                    for child in expansion.children:
+                        choice = child.path[-1]
+                        edge = (
+                            expansion.task_name,
+                            " ".join((choice.action, *map(str, choice.args))),
+                        )
+                        edges[edge] = edges.get(edge, 0) + 1
+                        if child.state_hash == COMPLETE:
+                            seen.add(COMPLETE)
+                            completed.append(child.path)
+                            continue
+                        if child.state_hash in seen:
+                            continue
+                        seen.add(child.state_hash)
+                        if len(child.path) < self._max_depth:
+                            next_frontier.append(child.path)
+                frontier = next_frontier
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return ExplorationReport(
+            all_tasks=set(workflow_tasks),
+            visited_tasks=visited_tasks,
+            edges=edges,
+            states=len(seen),
+            completed=completed,
+            failures=failures,
+            duration=perf_counter() - start,
+        )
@@ -0,0 +1,93 @@
+"""Immutable dict/list types used to hold execution context state.
+
+State is shared between execution contexts and handed to validators,
+components and tasks on every read, freezing it means it can be handed out
+without a defensive deepcopy. Writes go through `merge` which only copies
+the path to the changed values, everything else is shared with the previous
+version.
+"""
+
+from copy import deepcopy
+
+
+class FrozenError(TypeError):
+    pass
+
+
+def _frozen(self, *args, **kwargs):
+    raise FrozenError(f"{self.__class__.__name__} can not be modified")
+
+
+class FrozenDict(dict):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _frozen
+    clear = pop = popitem = setdefault = update = _frozen
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict.__repr__(self)})"
+
+
+class FrozenList(list):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _frozen
+    append = extend = insert = pop = remove = clear = sort = reverse = _frozen
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list.__repr__(self)})"
+
+
+def freeze(value):
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Returns a plain mutable (deep) copy of a frozen value"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return deepcopy(value)
+
+
+def merge(base: FrozenDict, update: dict) -> FrozenDict:
+    """Frozen equivalent of utils.deepmerge, subtrees of base which are not
+    touched by update are shared with the returned value"""
+    base = freeze(base)
+    changed = {}
+    for key, value in update.items():
+        current = base.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            value = merge(current, value)
+        else:
+            value = freeze(value)
+        if key not in base or base[key] is not value:
+            changed[key] = value
+    if not changed:
+        return base
+    return FrozenDict({**base, **changed})
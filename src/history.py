@@ -1,3 +1,240 @@
-from collections import namedtuple
+import pickle
+import zlib
+from collections import deque, namedtuple
 
-Entry = namedtuple("HistoryEntry", ("execution_context",))
\ No newline at end of file
+from .context import ExecutionContext
+from .exceptions import InvalidEmptyStackOperation
+from .frozen import thaw
+from .utils import deepmerge_into
+
+Entry = namedtuple("HistoryEntry", ("execution_context",))
+
+
+def _encode(value) -> bytes:
+    return zlib.compress(pickle.dumps(thaw(value), protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _decode(data: bytes):
+    return pickle.loads(zlib.decompress(data))
+
+
+def _apply_removed(state: dict, removed: dict) -> dict:
+    for key, inner in removed.items():
+        if inner is None:
+            state.pop(key, None)
+        elif isinstance(state.get(key), dict):
+            _apply_removed(state[key], inner)
+    return state
+
+
+def _delta(old: dict, new: dict):
+    # Returns (changed, removed), the values in new which differ from old and
+    # a nested dict of the keys in old which are missing from new. States are
+    # frozen so subtrees shared between them are skipped without comparing
+    changed = {}
+    removed = {}
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+        elif (old_value := old[key]) is value:
+            continue
+        elif isinstance(value, dict) and isinstance(old_value, dict):
+            inner_changed, inner_removed = _delta(old_value, value)
+            if inner_changed:
+                changed[key] = inner_changed
+            if inner_removed:
+                removed[key] = inner_removed
+        elif value != old_value:
+            changed[key] = value
+    for key in old:
+        if key not in new:
+            removed[key] = None
+    return changed, removed
+
+
+def _apply_delta(state: dict, delta) -> dict:
+    changed, removed = delta
+    return _apply_removed(deepmerge_into(state, changed), removed)
+
+
+class _Record:
+    __slots__ = (
+        "context_attrs",
+        "keyframe",
+        "frozen",
+        "state",
+        "result",
+        "size",
+    )
+
+    def __init__(self, context_attrs, keyframe, frozen):
+        self.context_attrs = context_attrs
+        self.keyframe = keyframe
+        # (state, result) of the context until the record is encoded, both
+        # are frozen so holding them costs only what isn't shared with the
+        # neighbouring entries
+        self.frozen = frozen
+        self.state = self.result = None
+        self.size = 0
+
+    def encode(self, previous_state):
+        # Returns the record's state for encoding the next record against
+        state, result = self.frozen
+        self.state = _encode(state if self.keyframe else _delta(previous_state, state))
+        self.result = _encode(result)
+        self.size = len(self.state) + len(self.result)
+        self.frozen = None
+        return state
+
+
+class HistoryStack:
+    """Stack of history entries which only holds the parts of each entry's
+    execution context needed to rebuild it.
+
+    Pushing only keeps a reference to the context's frozen state and result.
+    Older entries are encoded `keyframe_interval` at a time once there are
+    twice that many unencoded ones, as a compressed keyframe every
+    `keyframe_interval` entries and as a compressed delta against the
+    previous entry otherwise. Deltas are taken between the frozen states so
+    only the subtrees which aren't shared are compared and pickled, keyframes
+    thaw and pickle the whole state. The newest entries (the ones going back
+    returns to) are always still frozen references.
+
+    When `max_depth` entries or `max_bytes` of encoded state is exceeded the
+    oldest entries are dropped. Unencoded entries don't count towards
+    `max_bytes` so it is checked as each batch is encoded. get_head rebuilds
+    the entry's execution context so moving back through the flow works as
+    with a plain stack of entries.
+    """
+
+    def __init__(self, max_depth=None, max_bytes=None, keyframe_interval=8):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.keyframe_interval = keyframe_interval
+        self._records = deque()
+        self._since_keyframe = 0
+        # Number of unencoded records, always the newest ones
+        self._pending = 0
+        # State of the newest encoded record, if known
+        self._last_state = None
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def push(self, entry: Entry):
+        context = entry.execution_context
+        keyframe = not self._records or self._since_keyframe >= self.keyframe_interval
+        self._since_keyframe = 0 if keyframe else self._since_keyframe + 1
+        self._records.append(
+            _Record(
+                context_attrs=(
+                    context.repos,
+                    context._event_handler,
+                    context._history_handle,
+                    context.flow,
+                    context._stack_handle,
+                    context.position,
+                ),
+                keyframe=keyframe,
+                frozen=(context.state, context.result),
+            )
+        )
+        self._pending += 1
+        if self._pending >= 2 * self.keyframe_interval:
+            self._encode_pending(self.keyframe_interval)
+        self._evict()
+
+    def _encode_pending(self, count):
+        index = len(self._records) - self._pending
+        state = self._last_state
+        if state is None and index > 0:
+            state = self._state_at(index - 1)
+        for index in range(index, index + count):
+            state = self._records[index].encode(state)
+            self.bytes += self._records[index].size
+        self._last_state = state
+        self._pending -= count
+
+    def _evict(self):
+        while self._records and (
+            (self.max_depth is not None and len(self._records) > self.max_depth)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            if len(self._records) > 1 and not self._records[1].keyframe:
+                # The next entry is about to lose the keyframe its delta is
+                # against so it becomes a keyframe
+                record = self._records[1]
+                if record.frozen is None:
+                    self.bytes -= record.size
+                    record.state = _encode(self._state_at(1))
+                    record.size = len(record.state) + len(record.result)
+                    self.bytes += record.size
+                record.keyframe = True
+            record = self._records.popleft()
+            if record.frozen is None:
+                self.bytes -= record.size
+            else:
+                self._pending -= 1
+        if not self._records:
+            self._last_state = None
+            self._since_keyframe = 0
+
+    def _state_at(self, index):
+        records = self._records
+        if records[index].frozen is not None:
+            return thaw(records[index].frozen[0])
+        start = index
+        while not records[start].keyframe:
+            start -= 1
+        state = _decode(records[start].state)
+        for position in range(start + 1, index + 1):
+            state = _apply_delta(state, _decode(records[position].state))
+        return state
+
+    def _result_at(self, index):
+        record = self._records[index]
+        return record.frozen[1] if record.frozen is not None else _decode(record.result)
+
+    def _entry_at(self, index) -> Entry:
+        record = self._records[index]
+        repos, event_handler, history_handle, flow, stack_handle, position = (
+            record.context_attrs
+        )
+        context = ExecutionContext(
+            initial_state=self._state_at(index),
+            repos=repos,
+            event_handler=event_handler,
+            history_handle=history_handle,
+            flow=flow,
+            stack_handle=stack_handle,
+            position=position,
+        )
+        context.update_result(self._result_at(index))
+        return Entry(execution_context=context)
+
+    def get_head(self) -> Entry:
+        if not self._records:
+            raise InvalidEmptyStackOperation()
+        return self._entry_at(len(self._records) - 1)
+
+    def pop(self):
+        if not self._records:
+            raise InvalidEmptyStackOperation()
+        record = self._records.pop()
+        if record.frozen is None:
+            self.bytes -= record.size
+            # The newest encoded state is rebuilt when it is next needed
+            self._last_state = None
+        else:
+            self._pending -= 1
+        # Restart the keyframe count from the last keyframe
+        self._since_keyframe = 0
+        for record in reversed(self._records):
+            if record.keyframe:
+                break
+            self._since_keyframe += 1
+
+    def entries(self) -> list[Entry]:
+        """All entries from oldest to newest"""
+        return [self._entry_at(i) for i in range(len(self._records))]
\ No newline at end of file
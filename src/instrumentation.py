@@ -0,0 +1,192 @@
+"""Opt-in timing and allocation instrumentation.
+
+While an Instrumentation is enabled the hooked methods are replaced by
+wrappers which record wall time, call counts and (optionally, using
+tracemalloc) bytes allocated, aggregated per task name. Disabling it puts
+the original methods back so there is no cost at all when it isn't in use.
+
+    with Instrumentation() as instrumentation:
+        ... drive a TestClient ...
+    print(instrumentation.summary())
+"""
+
+import tracemalloc
+from collections import namedtuple
+from functools import wraps
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
+from .context import ExecutionContext
+from .tasks import Flow, Screen, Task
+from .validators import Validator
+
+Row = namedtuple(
+    "Row", ("task_name", "hook", "calls", "total_time", "mean_time", "bytes")
+)
+
+
+def _task_name(context):
+    task = context.task if context is not None else None
+    return task.name if task is not None else None
+
+
+def _subclasses(cls):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _subclasses(subclass)
+
+
+class Instrumentation:
+    _active = None
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self._stats = {}
+        self._patched = []
+        self._task_starts = WeakKeyDictionary()
+        self._started_tracemalloc = False
+
+    def record(self, hook, task_name, elapsed, nbytes=0):
+        key = (task_name, hook)
+        calls, total, total_bytes = self._stats.get(key, (0, 0.0, 0))
+        self._stats[key] = (calls + 1, total + elapsed, total_bytes + nbytes)
+
+    def _allocated(self):
+        return tracemalloc.get_traced_memory()[0] if self.allocations else 0
+
+    def _wrap(self, hook, func, get_task_name):
+        @wraps(func)
+        def _instrumented(obj, *args, **kwargs):
+            allocated = self._allocated()
+            start = perf_counter()
+            try:
+                return func(obj, *args, **kwargs)
+            finally:
+                self.record(
+                    hook,
+                    get_task_name(obj),
+                    perf_counter() - start,
+                    max(self._allocated() - allocated, 0),
+                )
+
+        return _instrumented
+
+    def _patch(self, cls, attr, replacement):
+        self._patched.append((cls, attr, cls.__dict__[attr]))
+        setattr(cls, attr, replacement)
+
+    def _patch_method(self, base, attr, hook, get_task_name):
+        for cls in _subclasses(base):
+            if attr in cls.__dict__:
+                self._patch(
+                    cls, attr, self._wrap(hook, cls.__dict__[attr], get_task_name)
+                )
+
+    def _patch_task_lifetime(self):
+        get_task_instance = Flow.__dict__["_get_task_instance"]
+        context_exit = ExecutionContext.__dict__["__exit__"]
+        starts = self._task_starts
+
+        @wraps(get_task_instance)
+        def _get_task_instance(flow, task, execution_context):
+            starts[execution_context] = (perf_counter(), self._allocated())
+            return get_task_instance(flow, task, execution_context)
+
+        @wraps(context_exit)
+        def __exit__(context, *args, **kwargs):
+            if context in starts:
+                start, allocated = starts.pop(context)
+                self.record(
+                    "task",
+                    _task_name(context),
+                    perf_counter() - start,
+                    max(self._allocated() - allocated, 0),
+                )
+            return context_exit(context, *args, **kwargs)
+
+        self._patch(Flow, "_get_task_instance", _get_task_instance)
+        self._patch(ExecutionContext, "__exit__", __exit__)
+
+    def enable(self):
+        if Instrumentation._active is not None:
+            raise RuntimeError("Another Instrumentation is already enabled")
+        Instrumentation._active = self
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        self._patch_task_lifetime()
+        self._patch_method(Task, "run", "run", lambda task: task.name)
+        self._patch_method(
+            Screen, "publish_result", "publish_result", lambda task: task.name
+        )
+        self._patch_method(
+            Validator,
+            "validate",
+            "validate",
+            lambda validator: _task_name(validator._execution_context),
+        )
+        state = ExecutionContext.__dict__["state"]
+        self._patch(
+            ExecutionContext,
+            "state",
+            property(self._wrap("state_read", state.fget, _task_name)),
+        )
+        return self
+
+    def disable(self):
+        while self._patched:
+            cls, attr, original = self._patched.pop()
+            setattr(cls, attr, original)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        Instrumentation._active = None
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def reset(self):
+        self._stats.clear()
+
+    def table(self) -> list[Row]:
+        return [
+            Row(
+                task_name=task_name,
+                hook=hook,
+                calls=calls,
+                total_time=total,
+                mean_time=total / calls,
+                bytes=nbytes,
+            )
+            for (task_name, hook), (calls, total, nbytes) in sorted(
+                self._stats.items(), key=lambda item: (str(item[0][0]), item[0][1])
+            )
+        ]
+
+    def as_dict(self) -> dict:
+        """Aggregates per task name, suitable for dumping to JSON"""
+        result = {}
+        for row in self.table():
+            result.setdefault(str(row.task_name), {})[row.hook] = {
+                "calls": row.calls,
+                "total_time": row.total_time,
+                "mean_time": row.mean_time,
+                "bytes": row.bytes,
+            }
+        return result
+
+    def summary(self) -> str:
+        lines = [
+            f"{'task':<30}{'hook':<16}{'calls':>8}{'total':>12}{'mean':>12}{'bytes':>12}"
+        ]
+        for row in self.table():
+            lines.append(
+                f"{str(row.task_name):<30}{row.hook:<16}{row.calls:>8}"
+                f"{row.total_time * 1e3:>10.3f}ms{row.mean_time * 1e6:>10.1f}us"
+                f"{row.bytes:>12}"
+            )
+        return "\n".join(lines)
@@ -1,10 +1,13 @@
 from collections import namedtuple
+from collections.abc import Mapping
+from json.decoder import WHITESPACE, scanstring
 import json
-
+import re
 
 ParseResult = namedtuple(
     "ParseResult",
-    ("components", "validators", "flows", "starting_flow", "context"),
+    ("components", "validators", "flows", "starting_flow", "context", "hash"),
+    defaults=(None,),
 )
 
 
@@ -21,7 +24,180 @@ def json_parser(workflow_str) -> ParseResult:
             flows=wf["flows"],
             starting_flow=wf["starting_flow"],
             context=wf["context"],
+            hash=wf.get("hash"),
         )
 
     except Exception as e:
         raise InvalidWorkflow from e
+
+
+class LazyMapping(Mapping):
+    """Read only mapping which loads each value on first lookup and keeps it"""
+
+    def __init__(self, keys, load):
+        self._keys = keys
+        self._load = load
+        self._loaded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._loaded[key]
+        except KeyError:
+            pass
+        if key not in self._keys:
+            raise KeyError(key)
+        # Two threads may both load the value, only one of them is kept
+        return self._loaded.setdefault(key, self._load(key))
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def map(self, func):
+        """Returns a LazyMapping which applies func(key, value) to each value
+        as it is loaded, the unmapped values are not kept"""
+        return LazyMapping(self._keys, lambda key: func(key, self._load(key)))
+
+    @property
+    def loaded(self):
+        return len(self._loaded)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} keys, {self.loaded} loaded)"
+
+
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Everything up to the next bracket which isn't in a string, strings are
+# consumed whole so only brackets are left to be counted in python
+_TO_BRACKET = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+_SCALAR_END = re.compile(r"[\s,\]}]|$")
+
+
+def _skip_ws(doc, pos):
+    return WHITESPACE.match(doc, pos).end()
+
+
+def _skip_value(doc, pos):
+    """Returns the end of the JSON value starting at pos without decoding it,
+    the value is only checked as far as needed to find its end"""
+    first = doc[pos : pos + 1]
+    if first == '"':
+        match = _STRING.match(doc, pos)
+        if match is None:
+            raise ValueError(f"Unterminated string at {pos}")
+        return match.end()
+    if first not in ("{", "["):
+        return _SCALAR_END.search(doc, pos).start()
+    depth = 0
+    to_bracket = _TO_BRACKET.match
+    while True:
+        pos = to_bracket(doc, pos).end()
+        bracket = doc[pos : pos + 1]
+        if bracket == "{" or bracket == "[":
+            depth += 1
+        elif bracket == "}" or bracket == "]":
+            depth -= 1
+            if not depth:
+                return pos + 1
+        else:
+            raise ValueError(f"Unterminated value at {pos}")
+        pos += 1
+
+
+def _index_object(doc, pos, nested=()):
+    """Returns ({key: (start, end)}, end) for the JSON object starting at
+    pos, all positions are indexes into the (str) document. The objects under
+    the `nested` keys are indexed in the same pass, their entry is the
+    {key: (start, end)} of the object"""
+    pos = _skip_ws(doc, pos)
+    if doc[pos] != "{":
+        raise ValueError(f"Expected an object at {pos}")
+    spans = {}
+    pos = _skip_ws(doc, pos + 1)
+    if doc[pos] == "}":
+        return spans, pos + 1
+    while True:
+        if doc[pos] != '"':
+            raise ValueError(f"Expected a key at {pos}")
+        key, pos = scanstring(doc, pos + 1)
+        pos = _skip_ws(doc, pos)
+        if doc[pos] != ":":
+            raise ValueError(f"Expected ':' at {pos}")
+        start = _skip_ws(doc, pos + 1)
+        if key in nested:
+            spans[key], end = _index_object(doc, start)
+        else:
+            end = _skip_value(doc, start)
+            spans[key] = (start, end)
+        pos = _skip_ws(doc, end)
+        if doc[pos] == "}":
+            return spans, pos + 1
+        if doc[pos] != ",":
+            raise ValueError(f"Expected ',' or '}}' at {pos}")
+        pos = _skip_ws(doc, pos + 1)
+
+
+def _lazy_section(doc, spans):
+    def load(key):
+        start, end = spans[key]
+        return json.loads(doc[start:end])
+
+    return LazyMapping(spans, load)
+
+
+def lazy_json_parser(workflow_str) -> ParseResult:
+    """Alternative to json_parser for large workflows, the first pass only
+    scans the structure of the document to record where each component,
+    validator and flow is (as indexes into the decoded str), they are
+    decoded when first looked up"""
+    try:
+        if isinstance(workflow_str, bytes):
+            workflow_str = workflow_str.decode("utf-8")
+        sections, _ = _index_object(
+            workflow_str, 0, nested=("components", "validators", "flows")
+        )
+
+        def load(key):
+            start, end = sections[key]
+            return json.loads(workflow_str[start:end])
+
+        return ParseResult(
+            components=_lazy_section(workflow_str, sections["components"]),
+            validators=_lazy_section(workflow_str, sections["validators"]),
+            flows=_lazy_section(workflow_str, sections["flows"]),
+            starting_flow=load("starting_flow"),
+            context=load("context"),
+            hash=load("hash") if "hash" in sections else None,
+        )
+
+    except Exception as e:
+        raise InvalidWorkflow from e
+
+
+PATH_KEYS = frozenset(
+    (
+        "destination_path",
+        "iterable_path",
+        "key",
+        "result_key",
+        "value_path",
+        "value_key",
+        "validator_key",
+    )
+)
+
+
+def iter_workflow_paths(node):
+    """Yields every jsonpath string found under a known path key in a
+    parsed workflow (or any part of one), LazyMappings are loaded in full"""
+    if isinstance(node, Mapping):
+        for key, value in node.items():
+            if key in PATH_KEYS and isinstance(value, str):
+                yield value
+            else:
+                yield from iter_workflow_paths(value)
+    elif isinstance(node, (list, tuple)):
+        for value in node:
+            yield from iter_workflow_paths(value)
@@ -1,6 +1,9 @@
-from jsonpath_ng import parse, jsonpath
 from copy import deepcopy
 
+from jsonpath_ng import parse, jsonpath
+
+from .utils import CacheInfo, LRUCache
+
 
 class UnhandledSetter(ValueError):
     pass
@@ -10,11 +13,68 @@ class NotFoundInContext(KeyError):
     pass
 
 
+class ExpressionCache(LRUCache):
+    """Bounded LRU cache of compiled jsonpath expressions keyed by path string.
+
+    Parsing a path is far more expensive than evaluating it, so every evaluator
+    shares a single instance of this cache.
+    """
+
+    def __init__(self, maxsize=1024):
+        super().__init__(maxsize=maxsize)
+
+    def get(self, path: str):
+        return self.get_or_create(path, parse)
+
+
+class CompiledPath(str):
+    """A path string which carries its compiled expression, used in compiled
+    workflows so evaluating the path skips the expression cache entirely"""
+
+    def __new__(cls, path, expr):
+        obj = super().__new__(cls, path)
+        obj.expr = expr
+        return obj
+
+    def __reduce__(self):
+        return (compile_path, (str(self),))
+
+
 class JSONPath:
+    _cache = ExpressionCache()
+
     def _get_expr(self, path):
-        if isinstance(path, jsonpath.Child):
+        if isinstance(path, CompiledPath):
+            return path.expr
+        if isinstance(path, jsonpath.JSONPath):
             return path
-        return parse(path)
+        return self._cache.get(path)
+
+    def precompile(self, paths):
+        for path in paths:
+            self._get_expr(path)
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        return cls._cache.info()
+
+    def field_keys(self, path):
+        """Returns the chain of dict keys a simple path (e.g. "$.a.b") selects
+        or None if the path uses anything other than single named fields"""
+        expr = self._get_expr(path)
+        keys = []
+        while isinstance(expr, jsonpath.Child):
+            keys.append(expr.right)
+            expr = expr.left
+        if not isinstance(expr, jsonpath.Root):
+            keys.append(expr)
+        keys.reverse()
+        if not all(
+            isinstance(k, jsonpath.Fields) and len(k.fields) == 1 and k.fields[0] != "*"
+            for k in keys
+        ):
+            return None
+        return tuple(k.fields[0] for k in keys)
 
     def get(self, context, path):
         return [d.value for d in self._get_expr(path).find(context)]
@@ -43,7 +103,7 @@ class JSONPath:
 
     def _set(self, context, path, value):
         expr = self._get_expr(path)
-        if not self.get(context=context, path=path):
+        if not expr.find(context):
             if not expr.left.find(context):
                 context = self._set(context, expr.left, {})
             set_value = self._new_node_setter(expr.right)
@@ -57,5 +117,13 @@ class JSONPath:
         return self._set(deepcopy(context), path, deepcopy(value))
 
 
+def compile_path(path) -> CompiledPath:
+    # Parsed directly, compiled workflows hold on to their paths so putting
+    # them through the shared cache would only evict everything else from it
+    if isinstance(path, CompiledPath):
+        return path
+    return CompiledPath(path, parse(path))
+
+
 def evaluator(_x=None):
     return JSONPath()
@@ -0,0 +1,125 @@
+"""Replays recorded session traces headlessly.
+
+Each step of a trace is applied to the task the client returns and the hash
+of the task's context is checked against the recorded one, the replay of a
+trace stops at the first step which doesn't match. JsonRpc tasks are given
+the recorded result rather than calling the server so the server is only
+used to fetch workflows, all clients share one WorkflowCache.
+"""
+
+from collections import namedtuple
+from time import perf_counter
+
+from .client import TestClient, WorkflowCache
+from .runner import LatencyStats, latency_stats
+from .trace import state_hash
+
+Divergence = namedtuple(
+    "Divergence", ("step", "expected", "task_name", "state_hash", "exception")
+)
+ReplayResult = namedtuple(
+    "ReplayResult", ("trace_id", "steps", "duration", "divergence")
+)
+
+
+class ReplayReport:
+    def __init__(self, results, duration):
+        self.results = results
+        self.duration = duration
+
+    @property
+    def diverged(self):
+        return [result for result in self.results if result.divergence is not None]
+
+    @property
+    def traces_per_second(self):
+        return len(self.results) / self.duration if self.duration else 0.0
+
+    def timings(self) -> LatencyStats:
+        return latency_stats(result.duration for result in self.results)
+
+    def summary(self) -> str:
+        timings = self.timings()
+        lines = [
+            f"{len(self.results)} traces ({len(self.diverged)} diverged) "
+            f"in {self.duration:.3f}s, {self.traces_per_second:.1f} traces/s",
+            "per trace "
+            + ", ".join(
+                f"{name} {value * 1e3:.3f}ms"
+                for name, value in zip(
+                    ("p50", "p90", "p99", "max"),
+                    (timings.p50, timings.p90, timings.p99, timings.max),
+                )
+            ),
+        ]
+        for result in self.diverged:
+            d = result.divergence
+            lines.append(
+                f"  trace {result.trace_id} diverged at step {d.step} "
+                f"{d.expected.task_name}.{d.expected.action}: "
+                + (
+                    repr(d.exception)
+                    if d.exception is not None
+                    else f"got {d.task_name} with state {d.state_hash}"
+                )
+            )
+        return "\n".join(lines)
+
+
+class Replayer:
+    def __init__(self, mock_server, **client_kwargs):
+        self._server = mock_server
+        self._client_kwargs = client_kwargs
+        self._client_kwargs.setdefault("workflow_cache", WorkflowCache())
+
+    def _apply(self, client, step):
+        # Returns the task the step was applied to
+        if step.action == "set_task_breakpoint":
+            client.set_task_breakpoint(*step.args)
+            return None
+        task = client.get_task()
+        if task is None or task.name != step.task_name:
+            return task
+        if step.action != "get_task":
+            getattr(task, step.action)(*step.args)
+        return task
+
+    def _check(self, index, step, task):
+        if step.action == "set_task_breakpoint":
+            return None
+        if task is None or task.name != step.task_name:
+            return Divergence(
+                index, step, task.name if task is not None else None, None, None
+            )
+        actual = state_hash(task._execution_context)
+        if actual != step.state_hash:
+            return Divergence(index, step, task.name, actual, None)
+        return None
+
+    def replay(self, trace, trace_id=None) -> ReplayResult:
+        start = perf_counter()
+        divergence = None
+        index = 0
+        try:
+            client = TestClient(self._server, trace.workflow_url, **self._client_kwargs)
+            for index, step in enumerate(trace.steps):
+                divergence = self._check(index, step, self._apply(client, step))
+                if divergence is not None:
+                    break
+        except Exception as e:
+            step = trace.steps[index] if trace.steps else None
+            divergence = Divergence(index, step, None, None, e)
+        return ReplayResult(
+            trace_id=trace_id,
+            steps=index + 1 if trace.steps else 0,
+            duration=perf_counter() - start,
+            divergence=divergence,
+        )
+
+    def run(self, traces) -> ReplayReport:
+        start = perf_counter()
+        results = [
+            self.replay(trace, trace_id=trace_id)
+            for trace_id, trace in enumerate(traces)
+        ]
+        return ReplayReport(results=results, duration=perf_counter() - start)
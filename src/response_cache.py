@@ -0,0 +1,100 @@
+"""Opt-in cache of JsonRpc responses, shared by every client given it.
+
+Only tasks which ask to be cached are, either in the workflow:
+
+    {"type": "jsonrpc", "name": "Countries", ..., "cache": {"ttl": 300}}
+
+("cache": true uses the cache's default ttl) or when creating the cache,
+which takes precedence over the workflow:
+
+    ResponseCache(tasks={"Countries": {"ttl": 300}, "SaveMessage": False})
+
+Responses are keyed on a hash of the task's url and payload so any session
+posting the same payload to the same url gets the cached response without
+the task being returned by get_task.
+"""
+
+import hashlib
+import json
+import time
+from collections import namedtuple
+
+from .frozen import freeze
+from .utils import LRUCache
+
+MISSING = object()
+
+ResponseCacheInfo = namedtuple(
+    "ResponseCacheInfo",
+    ("hits", "misses", "expired", "evictions", "maxsize", "currsize", "hit_rate"),
+)
+
+
+def response_key(url, payload) -> bytes:
+    return hashlib.blake2b(
+        json.dumps(
+            [url, payload], sort_keys=True, separators=(",", ":"), default=str
+        ).encode(),
+        digest_size=16,
+    ).digest()
+
+
+class ResponseCache(LRUCache):
+    def __init__(self, maxsize=1024, ttl=None, tasks=None, clock=time.monotonic):
+        super().__init__(maxsize=maxsize)
+        self.ttl = ttl
+        self._tasks = tasks or {}
+        self._clock = clock
+        self.expired = 0
+
+    def policy(self, task_config):
+        """Returns (cached, ttl) for a JsonRpc task's config"""
+        config = self._tasks.get(task_config["name"], task_config.get("cache"))
+        if not config:
+            return False, None
+        if config is True:
+            return True, self.ttl
+        return True, config.get("ttl", self.ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+                self.expired += 1
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value, ttl=None):
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._items[key] = (expires_at, freeze(value))
+            self._items.move_to_end(key)
+            self._evict()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self.expired = 0
+        super().clear()
+
+    def info(self) -> ResponseCacheInfo:
+        with self._lock:
+            return ResponseCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                expired=self.expired,
+                evictions=self.evictions,
+                maxsize=self.maxsize,
+                currsize=len(self._items),
+                hit_rate=self.hit_rate,
+            )
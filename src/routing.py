@@ -0,0 +1,165 @@
+"""Route table for the mock servers.
+
+Routes are url patterns split on "/" where a segment can be:
+
+    {name}       matches any one segment, passed to the handler as name
+    {name:path}  matches the rest of the url (last segment only)
+    *            matches any one segment
+    **           matches the rest of the url (last segment only)
+
+or anything else to be matched exactly. Urls without any of these are kept
+in a dict so looking them up is a single dict lookup, the rest are kept in
+a trie of segments which is walked once per url segment preferring exact
+segments, then parameters, then wildcards.
+
+Routes can be added from any thread while urls are being matched, adding is
+done under a lock and only ever adds to the trie.
+"""
+
+from collections import namedtuple
+from threading import Lock
+
+Match = namedtuple("Match", ("value", "params"))
+
+
+class InvalidRoute(ValueError):
+    pass
+
+
+class _Entry:
+    __slots__ = ["pattern", "method", "value", "hits"]
+
+    def __init__(self, pattern, method, value):
+        self.pattern = pattern
+        self.method = method
+        self.value = value
+        self.hits = 0
+
+
+class _Node:
+    __slots__ = ["children", "param", "param_node", "rest", "entries"]
+
+    def __init__(self):
+        self.children = {}
+        # Name of the segment parameter ("" for *) and the node after it
+        self.param = None
+        self.param_node = None
+        # (name, {method: entry}) for a trailing {name:path} or **
+        self.rest = None
+        self.entries = {}
+
+
+def _is_dynamic(segment):
+    return segment in ("*", "**") or (segment[:1] == "{" and segment[-1:] == "}")
+
+
+def _param(segment):
+    # Returns (name, is_rest) for a dynamic segment
+    if segment == "*":
+        return "", False
+    if segment == "**":
+        return "", True
+    name, _, kind = segment[1:-1].partition(":")
+    if kind not in ("", "path"):
+        raise InvalidRoute(f"Unknown parameter type {kind} in {segment}")
+    return name, kind == "path"
+
+
+class Router:
+    def __init__(self):
+        self._static = {}
+        self._root = _Node()
+        self._entries = {}
+        self._lock = Lock()
+        self._hits_lock = Lock()
+
+    def add(self, pattern, method, value):
+        segments = pattern.split("/")
+        with self._lock:
+            key = (pattern, method)
+            if key in self._entries:
+                # Re-registering replaces the value but keeps the counters
+                self._entries[key].value = value
+                return
+            entry = _Entry(pattern, method, value)
+            if not any(_is_dynamic(segment) for segment in segments):
+                self._static[key] = entry
+                self._entries[key] = entry
+                return
+
+            node = self._root
+            for index, segment in enumerate(segments):
+                if not _is_dynamic(segment):
+                    node = node.children.setdefault(segment, _Node())
+                    continue
+                name, is_rest = _param(segment)
+                if is_rest:
+                    if index != len(segments) - 1:
+                        raise InvalidRoute(f"{segment} must be last in {pattern}")
+                    if node.rest is None:
+                        node.rest = (name, {})
+                    elif node.rest[0] != name:
+                        raise InvalidRoute(f"{pattern} conflicts with another route")
+                    node.rest[1][method] = entry
+                    self._entries[key] = entry
+                    return
+                if node.param_node is None:
+                    # The name is set first as matching only checks param_node
+                    node.param = name
+                    node.param_node = _Node()
+                elif node.param != name:
+                    raise InvalidRoute(f"{pattern} conflicts with another route")
+                node = node.param_node
+            node.entries[method] = entry
+            self._entries[key] = entry
+
+    def _find(self, node, segments, index, method, params):
+        if index == len(segments):
+            entry = node.entries.get(method)
+            if entry is not None:
+                return entry
+        else:
+            segment = segments[index]
+            child = node.children.get(segment)
+            if child is not None and (
+                entry := self._find(child, segments, index + 1, method, params)
+            ):
+                return entry
+            if node.param_node is not None and (
+                entry := self._find(
+                    node.param_node, segments, index + 1, method, params
+                )
+            ):
+                if node.param:
+                    params[node.param] = segment
+                return entry
+        if node.rest is not None and (entry := node.rest[1].get(method)):
+            if node.rest[0]:
+                params[node.rest[0]] = "/".join(segments[index:])
+            return entry
+        return None
+
+    def _hit(self, entry):
+        with self._hits_lock:
+            entry.hits += 1
+
+    def match(self, url, method) -> Match | None:
+        entry = self._static.get((url, method))
+        params = {}
+        if entry is None:
+            entry = self._find(self._root, url.split("/"), 0, method, params)
+            if entry is None:
+                return None
+        self._hit(entry)
+        return Match(value=entry.value, params=params)
+
+    def items(self):
+        """Yields ((pattern, method), value) for every route"""
+        for key, entry in list(self._entries.items()):
+            yield key, entry.value
+
+    def hits(self) -> dict:
+        return {key: entry.hits for key, entry in list(self._entries.items())}
+
+    def __len__(self):
+        return len(self._entries)
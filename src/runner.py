@@ -0,0 +1,193 @@
+"""Runs many scripted sessions of the same workflow concurrently on asyncio.
+
+Sessions are plain TestClients sharing one WorkflowCache so the workflow is
+fetched and compiled once. JsonRpc tasks are sent to the server by the
+runner, awaiting the handler if it is async, so slow backends only block the
+session waiting on them.
+"""
+
+import asyncio
+import inspect
+from collections import defaultdict, namedtuple
+from time import perf_counter
+
+from .client import TestClient, WorkflowCache, cache_entry
+from .parser import json_parser
+from .tasks import JsonRpc, JsonRpcBatch
+
+Step = namedtuple("Step", ("task_name", "action", "args"), defaults=((),))
+SessionFailure = namedtuple("SessionFailure", ("session_id", "exception"))
+LatencyStats = namedtuple("LatencyStats", ("count", "p50", "p90", "p99", "max"))
+
+
+class ScriptMismatch(Exception):
+    pass
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_stats(values) -> LatencyStats:
+    values = sorted(values)
+    return LatencyStats(
+        count=len(values),
+        p50=percentile(values, 0.5),
+        p90=percentile(values, 0.9),
+        p99=percentile(values, 0.99),
+        max=values[-1] if values else 0.0,
+    )
+
+
+def latency_table(stats: dict[str, LatencyStats]) -> list[str]:
+    lines = [f"{'step':<40}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"]
+    for step, s in stats.items():
+        lines.append(
+            f"{step:<40}{s.count:>8}"
+            + "".join(f"{v * 1e3:>8.3f}ms" for v in (s.p50, s.p90, s.p99, s.max))
+        )
+    return lines
+
+
+def drive_script(client, script, latencies, label):
+    """Applies the steps of script to the tasks the client returns, recording
+    how long each took in latencies. JsonRpc tasks are yielded for the caller
+    to post and set the result of, and None is yielded after each step, so
+    the one driver works with both sync and async servers.
+
+    The script may stop before the workflow does but it is a ScriptMismatch
+    if a step is for a different task or steps are left when it ends."""
+    steps = iter(script)
+    while (task := client.get_task()) is not None:
+        start = perf_counter()
+        if isinstance(task, (JsonRpc, JsonRpcBatch)):
+            yield task
+            latencies[f"{task.name}.jsonrpc"].append(perf_counter() - start)
+            continue
+
+        step = next(steps, None)
+        if step is None:
+            return
+        if step.task_name != task.name:
+            raise ScriptMismatch(
+                f"{label} expected task {step.task_name} but got {task.name}"
+            )
+        getattr(task, step.action)(*step.args)
+        latencies[f"{task.name}.{step.action}"].append(perf_counter() - start)
+        yield None
+    if (step := next(steps, None)) is not None:
+        raise ScriptMismatch(
+            f"{label} ended with steps left from {step.task_name}.{step.action}"
+        )
+
+
+class RunReport:
+    def __init__(self, sessions, duration, latencies, failures):
+        self.sessions = sessions
+        self.duration = duration
+        self.latencies = latencies
+        self.failures = failures
+
+    @property
+    def steps(self):
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def sessions_per_second(self):
+        return self.sessions / self.duration if self.duration else 0.0
+
+    @property
+    def steps_per_second(self):
+        return self.steps / self.duration if self.duration else 0.0
+
+    def latency_stats(self) -> dict[str, LatencyStats]:
+        return {
+            step: latency_stats(values)
+            for step, values in sorted(self.latencies.items())
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.sessions} sessions ({len(self.failures)} failed), "
+            f"{self.steps} steps in {self.duration:.3f}s",
+            f"{self.sessions_per_second:.1f} sessions/s, "
+            f"{self.steps_per_second:.1f} steps/s",
+        ]
+        return "\n".join(lines + latency_table(self.latency_stats()))
+
+
+class SessionRunner:
+    def __init__(
+        self,
+        mock_server,
+        workflow_url,
+        concurrency=1000,
+        prefetch_urls=(),
+        **client_kwargs,
+    ):
+        self._server = mock_server
+        self._workflow_url = workflow_url
+        self._concurrency = concurrency
+        self._prefetch_urls = (workflow_url, *prefetch_urls)
+        self._client_kwargs = client_kwargs
+        self._client_kwargs.setdefault("workflow_cache", WorkflowCache())
+
+    async def _prefetch(self):
+        # Clients load workflows synchronously so with an async server
+        # (AsyncMockServer) the workflows, including any redirect targets,
+        # are fetched up front into the shared cache
+        cache = self._client_kwargs["workflow_cache"]
+        parser = self._client_kwargs.get("workflow_parser", json_parser)
+        precompile_paths = self._client_kwargs.get("precompile_paths", False)
+        for url in self._prefetch_urls:
+            raw_workflow = self._server.get(url)
+            if inspect.isawaitable(raw_workflow):
+                raw_workflow = await raw_workflow
+            cache.get_or_create(
+                url, lambda _: cache_entry(raw_workflow, parser, precompile_paths)
+            )
+
+    async def _call_rpc(self, task):
+        result = self._server.post(task.get_endpoint(), task.get_payload())
+        if inspect.isawaitable(result):
+            result = await result
+        task.set_result(result)
+
+    async def _run_session(self, session_id, script, latencies):
+        client = TestClient(self._server, self._workflow_url, **self._client_kwargs)
+        for task in drive_script(client, script, latencies, f"Session {session_id}"):
+            if task is None:
+                # Give the other sessions a turn
+                await asyncio.sleep(0)
+            else:
+                await self._call_rpc(task)
+
+    async def run(self, scripts) -> RunReport:
+        """Runs a session for each script, a script being an iterable of Steps
+        which are applied to the tasks in order"""
+        semaphore = asyncio.Semaphore(self._concurrency)
+        latencies = defaultdict(list)
+        failures = []
+
+        async def _session(session_id, script):
+            async with semaphore:
+                try:
+                    await self._run_session(session_id, script, latencies)
+                except Exception as e:
+                    failures.append(SessionFailure(session_id, e))
+
+        start = perf_counter()
+        await self._prefetch()
+        sessions = [
+            _session(session_id, script) for session_id, script in enumerate(scripts)
+        ]
+        await asyncio.gather(*sessions)
+        return RunReport(
+            sessions=len(sessions),
+            duration=perf_counter() - start,
+            latencies=dict(latencies),
+            failures=failures,
+        )
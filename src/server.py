@@ -1,5 +1,13 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import asyncio
 import enum
+import inspect
+import math
+import random
+import time
+import weakref
+
+from .routing import Router
 
 
 class Methods(enum.Enum):
@@ -12,22 +20,220 @@ class MockServerErrorResponce(Exception):
 
 
 class MockServer:
+    """Urls can contain path parameters ({name}, {name:path}) and wildcards
+    (*, **), see routing, parameters are passed to the handler as keyword
+    arguments"""
+
     def __init__(self) -> None:
-        self._endpoints = {}
+        self._endpoints = Router()
 
     def register_handler(self, url, method, handler):
-        self._endpoints[(url, method)] = handler
+        self._endpoints.add(url, method, handler)
+
+    def _route(self, url, method):
+        match = self._endpoints.match(url, method)
+        if match is None:
+            raise MockServerErrorResponce(
+                f"Handler for {url} not found for method {method}"
+            )
+        return match
 
     def _lookup(self, url, method, args):
-        key = (url, method)
-        if key in self._endpoints:
-            return self._endpoints[key](args)
-        raise MockServerErrorResponce(
-            f"Handler for {url} not found for method {method}"
-        )
+        handler, params = self._route(url, method)
+        return handler(args, **params)
+
+    def hits(self) -> dict:
+        """Number of requests matched by each registered (url, method)"""
+        return self._endpoints.hits()
 
     def get(self, url):
         return self._lookup(url, Methods.GET, None)
 
     def post(self, url, args):
-        return self._lookup(url, Methods.POST, args)
\ No newline at end of file
+        return self._lookup(url, Methods.POST, args)
+
+
+def jsonrpc_batch_handler(handler):
+    """Wraps a handler of a single request's params into a handler of JSON-RPC
+    2.0 batches (see tasks.JsonRpcBatch), plain payloads are passed straight
+    through so the same route can serve both"""
+
+    def handle(payload, **params):
+        if not isinstance(payload, list):
+            return handler(payload, **params)
+        responses = []
+        for request in payload:
+            try:
+                result = handler(request["params"], **params)
+            except MockServerErrorResponce as e:
+                responses.append(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": request["id"],
+                        "error": {"code": -32000, "message": str(e)},
+                    }
+                )
+            else:
+                responses.append(
+                    {"jsonrpc": "2.0", "id": request["id"], "result": result}
+                )
+        return responses
+
+    return handle
+
+
+def fixed_latency(seconds):
+    return lambda rng: seconds
+
+
+def uniform_latency(low, high):
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential_latency(mean):
+    return lambda rng: rng.expovariate(1 / mean)
+
+
+def lognormal_latency(median, sigma=0.5):
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+RouteStats = namedtuple(
+    "RouteStats",
+    (
+        "requests",
+        "errors",
+        "in_flight",
+        "max_in_flight",
+        "requests_per_second",
+        "mean_queue_delay",
+        "max_queue_delay",
+    ),
+)
+
+
+class _Route:
+    def __init__(self, handler, latency, concurrency, error_rate, error):
+        self.handler = handler
+        self.latency = latency
+        self.concurrency = concurrency
+        self.error_rate = error_rate
+        self.error = error
+        # Semaphores are bound to the loop they're first used on so the server
+        # keeps one per loop it is used from
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.first_request = None
+        self.last_request = None
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def semaphore(self):
+        if self.concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    def stats(self) -> RouteStats:
+        elapsed = self.last_request - self.first_request if self.requests > 1 else 0.0
+        return RouteStats(
+            requests=self.requests,
+            errors=self.errors,
+            in_flight=self.in_flight,
+            max_in_flight=self.max_in_flight,
+            requests_per_second=self.requests / elapsed if elapsed else 0.0,
+            mean_queue_delay=(
+                self.total_queue_delay / self.requests if self.requests else 0.0
+            ),
+            max_queue_delay=self.max_queue_delay,
+        )
+
+
+class AsyncMockServer(MockServer):
+    """MockServer whose get and post are coroutines.
+
+    Handlers may be plain or async functions. Each route can be given a latency
+    distribution (a function taking a random.Random and returning seconds, see
+    the *_latency helpers), a cap on concurrent requests, and an error rate at
+    which `error` (by default MockServerErrorResponce) is raised instead of
+    calling the handler.
+    """
+
+    def __init__(self, seed=None) -> None:
+        super().__init__()
+        self._random = random.Random(seed)
+
+    def register_handler(
+        self,
+        url,
+        method,
+        handler,
+        latency=None,
+        concurrency=None,
+        error_rate=0.0,
+        error=None,
+    ):
+        self._endpoints.add(
+            url,
+            method,
+            _Route(
+                handler=handler,
+                latency=latency,
+                concurrency=concurrency,
+                error_rate=error_rate,
+                error=error,
+            ),
+        )
+
+    async def _lookup(self, url, method, args):
+        route, params = self._route(url, method)
+        queued_at = time.perf_counter()
+        route.requests += 1
+        route.first_request = route.first_request or queued_at
+        route.last_request = queued_at
+
+        semaphore = route.semaphore()
+        if semaphore is not None:
+            try:
+                await semaphore.acquire()
+            except Exception:
+                route.errors += 1
+                raise
+        queue_delay = time.perf_counter() - queued_at
+        route.total_queue_delay += queue_delay
+        route.max_queue_delay = max(route.max_queue_delay, queue_delay)
+        route.in_flight += 1
+        route.max_in_flight = max(route.max_in_flight, route.in_flight)
+        try:
+            if route.latency is not None:
+                await asyncio.sleep(route.latency(self._random))
+            if route.error_rate and self._random.random() < route.error_rate:
+                raise route.error or MockServerErrorResponce(
+                    f"Injected error for {url} method {method}"
+                )
+            result = route.handler(args, **params)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception:
+            route.errors += 1
+            raise
+        finally:
+            route.in_flight -= 1
+            if semaphore is not None:
+                semaphore.release()
+
+    async def get(self, url):
+        return await self._lookup(url, Methods.GET, None)
+
+    async def post(self, url, args):
+        return await self._lookup(url, Methods.POST, args)
+
+    def stats(self) -> dict:
+        return {key: route.stats() for key, route in self._endpoints.items()}
@@ -0,0 +1,251 @@
+"""Runs scenario scripts across a pool of worker processes.
+
+Every worker builds one server from `server_factory` (a module level
+function, as with the explorer) and one WorkflowCache so the workflow is
+fetched and compiled once per worker. Scenarios are handed out one chunk at
+a time from the pool's shared queue, a worker which finishes early takes the
+next chunk rather than sitting on a fixed shard, and results are yielded as
+each chunk finishes.
+
+Scenarios can be loaded from a JSON lines file, one scenario per line:
+
+    {"name": "submit", "steps": [["InputMessage", "set", ["field", "a"]], ...]}
+
+and the runner used from the command line:
+
+    PYTHONPATH="." python -m src.sharded scenarios.jsonl \\
+        --server-factory my_module:make_server --workflow-url /api/quickstart
+"""
+
+import argparse
+import importlib
+import json
+import os
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+
+from .client import TestClient, WorkflowCache
+from .runner import LatencyStats, Step, drive_script, latency_stats, latency_table
+
+Scenario = namedtuple("Scenario", ("name", "steps"))
+ScenarioResult = namedtuple(
+    "ScenarioResult", ("name", "worker", "steps", "duration", "latencies", "error")
+)
+
+
+def load_scenarios(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                scenario = json.loads(line)
+                yield Scenario(
+                    name=scenario["name"],
+                    steps=tuple(
+                        Step(step[0], step[1], tuple(step[2]) if len(step) > 2 else ())
+                        for step in scenario["steps"]
+                    ),
+                )
+
+
+class ShardedReport:
+    def __init__(self, results, duration):
+        self.results = results
+        self.duration = duration
+
+    @property
+    def failures(self):
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def scenarios_per_second(self):
+        return len(self.results) / self.duration if self.duration else 0.0
+
+    def per_worker(self) -> dict[int, int]:
+        counts = defaultdict(int)
+        for result in self.results:
+            counts[result.worker] += 1
+        return dict(counts)
+
+    def latency_stats(self) -> dict[str, LatencyStats]:
+        latencies = defaultdict(list)
+        for result in self.results:
+            for step, values in result.latencies.items():
+                latencies[step].extend(values)
+        return {
+            step: latency_stats(values) for step, values in sorted(latencies.items())
+        }
+
+    def summary(self) -> str:
+        per_worker = self.per_worker()
+        lines = [
+            f"{len(self.results)} scenarios ({len(self.failures)} failed) "
+            f"in {self.duration:.3f}s, {self.scenarios_per_second:.1f} scenarios/s",
+            f"scenarios per worker ({len(per_worker)} workers): "
+            + ", ".join(str(count) for count in sorted(per_worker.values())),
+            *latency_table(self.latency_stats()),
+        ]
+        for result in self.failures:
+            lines.append(f"  {result.name}: {result.error}")
+        return "\n".join(lines)
+
+
+class _Worker:
+    def __init__(self, server_factory, workflow_url, client_kwargs):
+        self._server = server_factory()
+        self._workflow_url = workflow_url
+        self._client_kwargs = dict(client_kwargs)
+        self._client_kwargs.setdefault("workflow_cache", WorkflowCache())
+        # Load the workflow up front so every scenario starts warm
+        TestClient(self._server, workflow_url, **self._client_kwargs)
+
+    def _run_script(self, scenario, latencies):
+        client = TestClient(self._server, self._workflow_url, **self._client_kwargs)
+        count = 0
+        for task in drive_script(
+            client, scenario.steps, latencies, f"Scenario {scenario.name}"
+        ):
+            if task is None:
+                count += 1
+            else:
+                task.set_result(
+                    self._server.post(task.get_endpoint(), task.get_payload())
+                )
+        return count
+
+    def run(self, scenario) -> ScenarioResult:
+        latencies = defaultdict(list)
+        start = perf_counter()
+        steps = 0
+        error = None
+        try:
+            steps = self._run_script(scenario, latencies)
+        except Exception as e:
+            # Exceptions may not survive being pickled back to the parent
+            error = f"{e.__class__.__name__}: {e}"
+        return ScenarioResult(
+            name=scenario.name,
+            worker=os.getpid(),
+            steps=steps,
+            duration=perf_counter() - start,
+            latencies=dict(latencies),
+            error=error,
+        )
+
+
+_worker = None
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _run_chunk(scenarios):
+    return [_worker.run(scenario) for scenario in scenarios]
+
+
+def _chunks(scenarios, size):
+    chunk = []
+    for scenario in scenarios:
+        chunk.append(scenario)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ShardedRunner:
+    def __init__(
+        self,
+        server_factory,
+        workflow_url,
+        processes=None,
+        chunksize=1,
+        **client_kwargs,
+    ):
+        self._server_factory = server_factory
+        self._workflow_url = workflow_url
+        self._processes = processes
+        self._chunksize = chunksize
+        self._client_kwargs = client_kwargs
+
+    def iter_results(self, scenarios):
+        """Yields a ScenarioResult for each scenario as they finish, which
+        isn't necessarily the order they were given in"""
+        init_args = (self._server_factory, self._workflow_url, self._client_kwargs)
+        chunks = _chunks(scenarios, self._chunksize)
+        if self._processes == 0:
+            _init_worker(*init_args)
+            for chunk in chunks:
+                yield from _run_chunk(chunk)
+            return
+
+        processes = self._processes or os.cpu_count()
+        with ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=init_args
+        ) as pool:
+            # Only a few chunks per worker are queued at a time so the
+            # scenarios aren't all pickled up front and idle workers always
+            # have a chunk to take
+            in_flight = set()
+            backlog = 4 * processes
+            for chunk in chunks:
+                in_flight.add(pool.submit(_run_chunk, chunk))
+                if len(in_flight) < backlog:
+                    continue
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            for future in wait(in_flight).done:
+                yield from future.result()
+
+    def run(self, scenarios, on_result=None) -> ShardedReport:
+        start = perf_counter()
+        results = []
+        for result in self.iter_results(scenarios):
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return ShardedReport(results=results, duration=perf_counter() - start)
+
+
+def _import(spec):
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", help="JSON lines file of scenarios")
+    parser.add_argument(
+        "--server-factory",
+        required=True,
+        help="module:function returning the MockServer for each worker",
+    )
+    parser.add_argument("--workflow-url", required=True)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    runner = ShardedRunner(
+        _import(args.server_factory),
+        args.workflow_url,
+        processes=args.processes,
+        chunksize=args.chunksize,
+    )
+    report = runner.run(
+        load_scenarios(args.scenarios),
+        on_result=lambda result: print(
+            f"{result.name}: {'FAILED ' + result.error if result.error else 'ok'} "
+            f"{result.duration * 1e3:.3f}ms",
+            flush=True,
+        ),
+    )
+    print(report.summary())
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
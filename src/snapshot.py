@@ -0,0 +1,147 @@
+"""Compact snapshots of a TestClient session which can be restored in
+another process.
+
+Flows are generators so can't be pickled, instead a snapshot stores the
+position of the current task in the flow, the state of the flow, the current
+task and each history entry as deltas against the workflow's initial
+context, and the values of the current screen's components. Restoring loads
+the workflow (from the workflow cache when warm) and fast-forwards the flow
+straight to the stored position, the same way moving back in a flow does.
+"""
+
+import pickle
+import zlib
+from collections import namedtuple
+
+from .client import TestClient
+from .exceptions import InvalidEmptyStackOperation
+from .frozen import merge, thaw
+from .history import Entry
+from .tasks import Screen
+from .utils import deepdiff, deepmerge
+
+MAGIC = b"WTCS"
+VERSION = 1
+
+ContextSnapshot = namedtuple("ContextSnapshot", ("position", "state", "result"))
+SessionSnapshot = namedtuple(
+    "SessionSnapshot",
+    (
+        "workflow_url",
+        "interupt_tasks",
+        "finished",
+        "flow_state",
+        "task",
+        "component_values",
+        "history",
+    ),
+)
+
+
+class InvalidSnapshot(Exception):
+    pass
+
+
+def _context_snapshot(context, base):
+    return ContextSnapshot(
+        position=context.position,
+        state=deepdiff(thaw(context.state), base),
+        result=thaw(context.result),
+    )
+
+
+def take(client: TestClient) -> SessionSnapshot:
+    base = client._workflow_parts.context
+    initial_context = client._initial_context
+    try:
+        head = client.context_stack.get_head()
+    except InvalidEmptyStackOperation:
+        # The workflow has run to completion
+        head = None
+
+    task = None
+    component_values = {}
+    flow_state = initial_context.state
+    if head is not None and head is not initial_context:
+        if head.task is not None and not head.task.requires_input:
+            # The task is complete but the flow only moves on to the next
+            # one on the next get_task, store the flow as it will be then
+            flow_state = merge(flow_state, head.result)
+            task = ContextSnapshot(
+                position=head.position + 1,
+                state=deepdiff(thaw(flow_state), base),
+                result={},
+            )
+        else:
+            task = _context_snapshot(head, base)
+            if isinstance(head.task, Screen):
+                component_values = {
+                    name: component.get_value()
+                    for name, component in head.task._components.items()
+                    if component.is_value_component and not component.is_button
+                }
+
+    return SessionSnapshot(
+        workflow_url=client.workflow_url,
+        interupt_tasks=sorted(client._interupt_tasks),
+        finished=head is None,
+        flow_state=deepdiff(thaw(flow_state), base),
+        task=task,
+        component_values=component_values,
+        history=[
+            _context_snapshot(entry.execution_context, base)
+            for entry in client._history_stack.entries()
+        ],
+    )
+
+
+def dumps(client: TestClient) -> bytes:
+    snapshot = take(client)
+    return (
+        MAGIC
+        + bytes((VERSION,))
+        + zlib.compress(pickle.dumps(tuple(snapshot), protocol=pickle.HIGHEST_PROTOCOL))
+    )
+
+
+def _restore_context(initial_context, snapshot, base):
+    context = initial_context.new_context(
+        snapshot.position, initial_state=deepmerge(base, snapshot.state)
+    )
+    context.update_result(snapshot.result)
+    return context
+
+
+def restore(mock_server, snapshot: SessionSnapshot, **client_kwargs) -> TestClient:
+    client = TestClient(mock_server, snapshot.workflow_url, **client_kwargs)
+    for name in snapshot.interupt_tasks:
+        client.set_task_breakpoint(name)
+
+    base = client._workflow_parts.context
+    initial_context = client._initial_context
+    initial_context.update_state(snapshot.flow_state)
+    for entry in snapshot.history:
+        client._history_stack.push(
+            Entry(execution_context=_restore_context(initial_context, entry, base))
+        )
+
+    if snapshot.finished:
+        initial_context.stop()
+    elif snapshot.task is not None:
+        initial_context.flow.re_init_iter(
+            _restore_context(initial_context, snapshot.task, base)
+        )
+        task = client.get_task()
+        if isinstance(task, Screen):
+            for name, value in snapshot.component_values.items():
+                task._get_component(name)._value = value
+    return client
+
+
+def loads(mock_server, data: bytes, **client_kwargs) -> TestClient:
+    if data[: len(MAGIC)] != MAGIC:
+        raise InvalidSnapshot("Not a session snapshot")
+    if data[len(MAGIC)] != VERSION:
+        raise InvalidSnapshot(f"Unsupported snapshot version {data[len(MAGIC)]}")
+    snapshot = SessionSnapshot(*pickle.loads(zlib.decompress(data[len(MAGIC) + 1 :])))
+    return restore(mock_server, snapshot, **client_kwargs)
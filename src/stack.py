@@ -1,6 +1,7 @@
 from copy import deepcopy
-from collections import MutableMapping
+from weakref import WeakSet
 from .exceptions import InvalidEmptyStackOperation
+from .frozen import freeze
 from .utils import deepmerge, deepdiff
 
 
@@ -75,6 +76,12 @@ class SparseStack:
     This quickly becomes complex with nested data the flatten and return approach is
     used here
 
+    Each layer caches its flattened head. As the flattened heads are built by
+    merging the layer's diff into the (frozen) head below it they share all
+    unchanged structure, so every layer is effectively a cheap full snapshot and
+    reading the head is O(1). Updating a layer invalidates the cached heads of the
+    layers pushed on top of it, these are rebuilt lazily on their next read.
+
     Note: the assumed type with default merge_strat and diff_strat is dicts if you wish
     to use a different type you must pass your own merge and diff strats
     """
@@ -88,18 +95,51 @@ class SparseStack:
     ):
         self.merge_strat = merge_strat
         self.diff_strat = diff_strat
-        self._head = diff_strat(head, tail)
-        self._tail = EmptyStack() if tail is None else tail
+        self._children = WeakSet()
+        if tail is None:
+            self._tail = EmptyStack()
+            self._head = deepcopy(head)
+        else:
+            self._tail = tail
+            self._head = diff_strat(head, tail.head)
+            tail._children.add(self)
+        self._cached_head = None
+
+    def _materialise(self):
+        # Walk down to the first layer with a cached head and then rebuild
+        # upwards, done iteratively as stacks can be deeper than the recursion limit
+        stale = []
+        layer = self
+        while layer._cached_head is None:
+            stale.append(layer)
+            if isinstance(layer._tail, EmptyStack):
+                break
+            layer = layer._tail
+        for layer in reversed(stale):
+            if isinstance(layer._tail, EmptyStack):
+                layer._cached_head = freeze(layer._head)
+            else:
+                layer._cached_head = freeze(
+                    layer.merge_strat(layer._tail._cached_head, layer._head)
+                )
+        return self._cached_head
+
+    def _invalidate(self):
+        # If a layer has no cached head then neither do the layers above it
+        layers = [self]
+        while layers:
+            layer = layers.pop()
+            if layer._cached_head is not None:
+                layer._cached_head = None
+                layers.extend(layer._children)
 
     @property
     def head(self):
-        res = self._head
-        if not isinstance(self._tail, EmptyStack):
-            res = self.merge_strat(self._tail.head, res)
-        return deepcopy(res)
+        return self._materialise()
 
     def update(self, update):
         self._head = self.merge_strat(self._head, update)
+        self._invalidate()
         return self
 
     def push(self, item):
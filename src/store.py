@@ -0,0 +1,134 @@
+"""On disk store of parsed workflows which can be shared between processes.
+
+Pass a WorkflowStore as the `workflow_parser` of a TestClient, the first
+process to load a workflow parses it and writes it to the store, every other
+process memory maps the stored file and decodes each component, validator and
+flow on first lookup, the same as `parser.lazy_json_parser`.
+
+A store file is laid out as:
+
+    MAGIC | VERSION | index length (u64) | marshalled index | entries
+
+The index holds the starting flow, context and hash of the workflow and the
+offset and length of every (marshalled) entry relative to the start of the
+entries.
+
+Workflows are stored under a digest of the document rather than their "hash"
+as finding the hash needs the document to be parsed.
+"""
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+
+from .parser import InvalidWorkflow, LazyMapping, ParseResult, json_parser
+
+MAGIC = b"WTCW"
+VERSION = 1
+SECTIONS = ("components", "validators", "flows")
+
+_header = struct.Struct(f"<{len(MAGIC)}sBQ")
+
+
+def _digest(workflow_str) -> str:
+    if isinstance(workflow_str, str):
+        workflow_str = workflow_str.encode("utf-8")
+    return hashlib.blake2b(workflow_str, digest_size=20).hexdigest()
+
+
+def dump(parts: ParseResult, file):
+    entries = bytearray()
+    sections = {}
+    for section in SECTIONS:
+        offsets = sections[section] = {}
+        for name, value in getattr(parts, section).items():
+            data = marshal.dumps(value)
+            offsets[name] = (len(entries), len(data))
+            entries += data
+    index = marshal.dumps(
+        {
+            "starting_flow": parts.starting_flow,
+            "context": parts.context,
+            "hash": parts.hash,
+            "sections": sections,
+        }
+    )
+    file.write(_header.pack(MAGIC, VERSION, len(index)))
+    file.write(index)
+    file.write(entries)
+
+
+def _section(buffer, start, offsets):
+    def load(name):
+        offset, length = offsets[name]
+        return marshal.loads(buffer[start + offset : start + offset + length])
+
+    return LazyMapping(offsets, load)
+
+
+def load(buffer) -> ParseResult:
+    """Returns the workflow stored in buffer (bytes or an mmap), entries are
+    decoded from the buffer on first lookup"""
+    try:
+        magic, version, index_length = _header.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a workflow store file or a different version")
+        start = _header.size + index_length
+        index = marshal.loads(buffer[_header.size : start])
+        return ParseResult(
+            **{
+                section: _section(buffer, start, index["sections"][section])
+                for section in SECTIONS
+            },
+            starting_flow=index["starting_flow"],
+            context=index["context"],
+            hash=index["hash"],
+        )
+    except Exception as e:
+        raise InvalidWorkflow from e
+
+
+class WorkflowStore:
+    def __init__(self, directory, workflow_parser=json_parser):
+        self.directory = directory
+        self._parser = workflow_parser
+        # Workflows already mapped by this process
+        self._loaded = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.directory, f"{digest}.wfc")
+
+    def _open(self, digest):
+        try:
+            with open(self.path(digest), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError is raised for empty files
+            return None
+        try:
+            return load(buffer)
+        except InvalidWorkflow:
+            return None
+
+    def _write(self, digest, parts):
+        # Written to a temporary file first so other processes never map a
+        # partially written file
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            dump(parts, f)
+        os.replace(f.name, self.path(digest))
+
+    def __call__(self, workflow_str) -> ParseResult:
+        digest = _digest(workflow_str)
+        if digest in self._loaded:
+            return self._loaded[digest]
+        parts = self._open(digest)
+        if parts is None:
+            self._write(digest, self._parser(workflow_str))
+            parts = self._open(digest)
+        return self._loaded.setdefault(digest, parts)
@@ -1,10 +1,11 @@
 from copy import deepcopy
 
 from . import utils
-from .components import COMPONENTS, Component
+from .components import COMPONENTS, Component, MessageBox
 from .path import evaluator
 from .registry import TASK_TYPES
-from .templating import process_template
+from .response_cache import MISSING, response_key
+from .templating import process_template, render_templates
 from .validators import Validator
 from .context import ExecutionContext
 
@@ -17,6 +18,14 @@ __all__ = (
 
 
 class Task:
+    __slots__ = [
+        "_task",
+        "_execution_context",
+        "_complete",
+        "_exit_reason",
+        "preconditions",
+    ]
+
     _requires_input = False
     _complete_by_default = True
 
@@ -63,40 +72,116 @@ class Task:
 
 
 class Screen(Task):
+    __slots__ = [
+        "_events",
+        "_add_event",
+        "_component_configs",
+        "_components",
+        "_conditional",
+        "_shown",
+        "_shown_state",
+        "_changed_values",
+        "_visible",
+    ]
+
     _requires_input = True
     _complete_by_default = False
+    # Components are only built when first needed, set to False to build all
+    # of them when the screen is created. A client can override this with
+    # TestClient(..., lazy_components=False) and a screen with
+    # "lazy_components": false in its task config
+    lazy_components = True
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._components = self._process_component_lookups()
         self._events = []
+        # All components share the one bound method
+        self._add_event = self._events.append
+        self._component_configs = self._process_component_lookups()
+        self._components = {}
+        # Visibility is tracked incrementally, components without
+        # preconditions are always shown and the rest are only re-checked
+        # when the state or their own value changes.
+        self._conditional = {
+            name
+            for name, config in self._component_configs.items()
+            if config.get("preconditions")
+        }
+        self._shown = dict.fromkeys(self._component_configs, True)
+        self._shown_state = None
+        self._changed_values = set()
+        self._visible = None
+        if not self._lazy_components():
+            for name in self._component_configs:
+                self._get_component(name)
+
+    def _lazy_components(self):
+        # The screen's own setting, then the client's, then the class default
+        lazy = self._task.get(
+            "lazy_components", self._execution_context.repos.lazy_components
+        )
+        return self.lazy_components if lazy is None else lazy
 
-    def _init_component(self, component_config: dict):
-        component_config["add_event"] = lambda e: self._events.append(e)
+    def _init_component(self, component_config: dict, add_event):
         return COMPONENTS[component_config["type"]](
             execution_context=self._execution_context,
+            add_event=add_event,
             **component_config,
         )
 
-    def _process_component_lookups(self) -> list[Component]:
-        components = {}
-        for row in self._task["components"]:
-            for lookup in row:
-                name = lookup["name"]
-                components[name] = self._init_component(
-                    component_config=(
-                        self._execution_context.repos.components[name] | lookup
-                    )
-                )
-        return components
+    def _resolve_component_lookups(self):
+        # Compiled workflows come with the lookups already resolved
+        if "resolved_components" in self._task:
+            return self._task["resolved_components"]
+        return [
+            [
+                self._execution_context.repos.components[lookup["name"]] | lookup
+                for lookup in row
+            ]
+            for row in self._task["components"]
+        ]
 
-    def get_components(self) -> dict[str, Component]:
-        return dict(
-            filter(
-                lambda c: c[1].show(),
-                self._components.items(),
+    def _process_component_lookups(self) -> dict[str, dict]:
+        return {
+            component_config["name"]: component_config
+            for row in self._resolve_component_lookups()
+            for component_config in row
+        }
+
+    def _get_component(self, name) -> Component:
+        component = self._components.get(name)
+        if component is None:
+            component = self._components[name] = self._init_component(
+                component_config=self._component_configs[name],
+                add_event=self._add_event,
             )
-        )
+        return component
+
+    def _refresh_visible(self):
+        state = self._execution_context.state
+        if state is not self._shown_state:
+            # The validators cache against the state they read so only
+            # preconditions which depend on the changed state are evaluated
+            stale = self._conditional
+        else:
+            stale = self._changed_values & self._conditional
+        self._shown_state = state
+        self._changed_values.clear()
+        if not stale and self._visible is not None:
+            return
+        for name in stale:
+            self._shown[name] = self._get_component(name).show()
+        self._visible = tuple(name for name, shown in self._shown.items() if shown)
+
+    def _get_visible_component(self, name) -> Component:
+        self._refresh_visible()
+        if not self._shown.get(name):
+            raise KeyError(name)
+        return self._get_component(name)
+
+    def get_components(self) -> dict[str, Component]:
+        self._refresh_visible()
+        return {name: self._get_component(name) for name in self._visible}
 
     def _process_events(self):
         for n, event in enumerate(self._events):
@@ -123,41 +208,125 @@ class Screen(Task):
         self._process_events()
 
     def set(self, field, value):
-        components = self.get_components()
-        components[field].set_value(value)
+        self._get_visible_component(field).set_value(value)
+        self._changed_values.add(field)
         self.publish_result()
+        self._execution_context.register_event(
+            "interaction", {"task": self, "action": "set", "args": (field, value)}
+        )
 
     def click(self, button_name):
-        components = self.get_components()
-        components[button_name].click()
+        self._get_visible_component(button_name).click()
+        self._changed_values.add(button_name)
         self.publish_result()
+        self._execution_context.register_event(
+            "interaction", {"task": self, "action": "click", "args": (button_name,)}
+        )
 
     @property
     def errors(self):
-        return {
-            name: component.errors
-            for name, component in self.get_components().items()
-            if component.errors
-        }
+        # Components which haven't been built haven't been validated and
+        # only value components have validators
+        self._refresh_visible()
+        errors = {}
+        for name in self._visible:
+            component = self._components.get(name)
+            if (
+                component is not None
+                and component.is_value_component
+                and (component_errors := component.errors)
+            ):
+                errors[name] = component_errors
+        return errors
+
+    def _result_value(self, name):
+        # Returns (destination_path, value) for the value components, without
+        # building those which haven't been built (their value is None)
+        if name in self._components:
+            component = self._components[name]
+            if component.is_value_component and not component.is_button:
+                return component.destination_path, component.get_value()
+            return None
+        config = self._component_configs[name]
+        component_cls = COMPONENTS[config["type"]]
+        if getattr(component_cls, "_is_value_component", False) and not getattr(
+            component_cls, "_is_button", False
+        ):
+            return config.get("destination_path"), None
+        return None
 
     @property
     def result(self):
+        self._refresh_visible()
         res = {}
-        for component in self.get_components().values():
-            if component.is_value_component and not component.is_button:
-                res = jsonpath.set(
-                    context=res,
-                    path=component.destination_path,
-                    value=component.get_value(),
+        for name in self._visible:
+            if (value := self._result_value(name)) is not None:
+                destination_path, value = value
+                res = utils.deepmerge_into(
+                    res,
+                    jsonpath.set(context={}, path=destination_path, value=value),
                 )
         return res
 
+    def _render_messages(self, components, message_boxes=False):
+        # Renders the messages of the failing validators of components, and
+        # the templates of the visible MessageBoxes if asked for, in one
+        # render_templates call against a single snapshot of the state
+        failing = {
+            name: component.failing_validators()
+            for name, component in components.items()
+            if component.is_value_component
+        }
+        templates = {}
+        if message_boxes:
+            templates = {
+                name: self._component_configs[name]["message"]["template"]
+                for name in self._visible
+                if COMPONENTS[self._component_configs[name]["type"]] is MessageBox
+            }
+        for name, validators in failing.items():
+            for index, validator in enumerate(validators):
+                templates[(name, index)] = validator.message_template
+        rendered = render_templates(templates, context=self._execution_context.state)
+        messages = {
+            name: message for name, message in rendered.items() if isinstance(name, str)
+        }
+        errors = {
+            name: tuple(rendered[(name, index)] for index in range(len(validators)))
+            for name, validators in failing.items()
+        }
+        return messages, errors
+
+    def _set_errors(self, errors):
+        for name, component_errors in errors.items():
+            self._components[name].set_errors(component_errors)
+
+    def get_messages(self) -> dict[str, str]:
+        """Renders the templates of all the visible components which have one
+        against a single snapshot of the state, the errors of components which
+        failed validation are re-rendered against the same snapshot"""
+        self._refresh_visible()
+        messages, errors = self._render_messages(
+            {
+                name: self._components[name]
+                for name in self._visible
+                if name in self._components and self._components[name].errors
+            },
+            message_boxes=True,
+        )
+        self._set_errors(errors)
+        return messages
+
     def _process_field_validators(self):
-        for component in self.get_components().values():
-            component.validate()
+        # Only the validators' messages, MessageBoxes may refer to state
+        # which isn't set until the screen is complete
+        _, errors = self._render_messages(self.get_components())
+        self._set_errors(errors)
 
 
 class JsonRpc(Task):
+    __slots__ = ["_payload", "_result", "_cache_key", "_cache_ttl"]
+
     _requires_input = True
     _complete_by_default = False
 
@@ -165,6 +334,21 @@ class JsonRpc(Task):
         super().__init__(**kwargs)
         self._payload = self._get_playload()
         self._result = {}
+        self._cache_key = self._cache_ttl = None
+        cache = self._execution_context.repos.response_cache
+        if cache is not None and self._task.get("destination_path"):
+            self._lookup_cached_result(cache)
+
+    def _lookup_cached_result(self, cache):
+        cached, self._cache_ttl = cache.policy(self._task)
+        if not cached:
+            return
+        self._cache_key = response_key(self.get_endpoint(), self._payload)
+        result = cache.get(self._cache_key)
+        if result is not MISSING:
+            # Complete so get_task never returns the task
+            self._result = self._destination_result(result)
+            self.set_as_complete()
 
     def get_endpoint(self):
         return self._task["url"]
@@ -185,7 +369,9 @@ class JsonRpc(Task):
     def _get_playload(self):
         payload = deepcopy(self._task["payload"])
         for instruction in self._task["payload_paths"]:
-            payload = utils.deepmerge(payload, self._process_instruction(instruction))
+            payload = utils.deepmerge_into(
+                payload, self._process_instruction(instruction)
+            )
         return payload
 
     def get_payload(self):
@@ -198,20 +384,99 @@ class JsonRpc(Task):
             return False
         return super().requires_input
 
-    def set_result(self, result):
-        self._result = jsonpath.set(
+    def _destination_result(self, result):
+        return jsonpath.set(
             context={},
             path=self._task["destination_path"],
             value=result,
         )
+
+    def _set_result(self, result):
+        self._result = self._destination_result(result)
+        if self._cache_key is not None:
+            self._execution_context.repos.response_cache.put(
+                self._cache_key, result, ttl=self._cache_ttl
+            )
         self.set_as_complete()
 
+    def set_result(self, result):
+        self._set_result(result)
+        self._execution_context.register_event(
+            "interaction", {"task": self, "action": "set_result", "args": (result,)}
+        )
+
     @property
     def result(self):
         return self._result
 
 
+class JsonRpcError(Exception):
+    pass
+
+
+class JsonRpcBatch:
+    """Consecutive JsonRpc tasks to the same url which don't depend on each
+    other's results, sent as a single JSON-RPC 2.0 batch request. The
+    payload is the list of requests and set_result takes the list of
+    responses, each response is routed to its task by id."""
+
+    __slots__ = ["tasks", "_execution_context"]
+
+    task_type = "jsonrpc_batch"
+
+    def __init__(self, tasks):
+        self.tasks = tuple(tasks)
+        self._execution_context = self.tasks[0]._execution_context
+
+    @property
+    def name(self):
+        return "+".join(task.name for task in self.tasks)
+
+    @property
+    def requires_input(self):
+        return any(task.requires_input for task in self.tasks)
+
+    def get_endpoint(self):
+        return self.tasks[0].get_endpoint()
+
+    def get_payload(self):
+        # Tasks answered from the response cache aren't sent
+        return [
+            {
+                "jsonrpc": "2.0",
+                "method": task._task.get("method") or task.name,
+                "params": task.get_payload(),
+                "id": request_id,
+            }
+            for request_id, task in enumerate(self.tasks)
+            if task.requires_input
+        ]
+
+    def set_result(self, responses):
+        by_id = {response["id"]: response for response in responses}
+        for request_id, task in enumerate(self.tasks):
+            if not task.requires_input:
+                continue
+            response = by_id.get(request_id)
+            if response is None:
+                raise JsonRpcError(f"No response for {task.name}")
+            if "error" in response:
+                raise JsonRpcError(f"{task.name}: {response['error']}")
+            task._set_result(response["result"])
+        self._execution_context.register_event(
+            "interaction", {"task": self, "action": "set_result", "args": (responses,)}
+        )
+
+
+def _overlaps(a, b):
+    # Whether either of the key paths is a prefix of the other, None being
+    # a path which isn't a simple key lookup so could be anything
+    return a is None or b is None or a[: len(b)] == b[: len(a)]
+
+
 class Update(Task):
+    __slots__ = []
+
     task_type = "update"
 
     def _process_instruction(self, instruction, extra_context=None):
@@ -233,16 +498,30 @@ class Update(Task):
     def result(self):
         res = {}
         for instruction in self._task["tasks"]:
-            res = utils.deepmerge(res, self._process_instruction(instruction, res))
+            res = utils.deepmerge_into(res, self._process_instruction(instruction, res))
         return res
 
 
 class Flow(Task):
+    __slots__ = [
+        "_task_iter",
+        "_actions",
+        "_task_names",
+        "_config",
+        "_interupt_tasks",
+        "_batch_jsonrpc",
+    ]
+
     _complete_by_default = False
+    # Send runs of independent JsonRpc tasks as one JsonRpcBatch, flows can
+    # also set "batch_jsonrpc" in their config
+    batch_jsonrpc = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._task |= self._execution_context.repos.flows[self._task["name"]]
+        self._task = (
+            self._task | self._execution_context.repos.flows[self._task["name"]]
+        )
         self._task_iter = None
         self._actions = []
         self._task_names = [
@@ -250,6 +529,7 @@ class Flow(Task):
         ]
         self._config = self._task["config"]
         self._interupt_tasks = set()
+        self._batch_jsonrpc = self._config.get("batch_jsonrpc", self.batch_jsonrpc)
 
     def _get_task_instance(self, task, execution_context):
         return TASK_TYPES[task["type"]](task=task, execution_context=execution_context)
@@ -273,16 +553,69 @@ class Flow(Task):
         for path in self._config.get("result_paths", []):
             # Note _process_instruction uses local_context which is the
             # the context stack within the task
-            result = utils.deepmerge(result, self._process_instruction(path))
+            result = utils.deepmerge_into(result, self._process_instruction(path))
         return result
 
+    def _is_batchable(self, task, url):
+        return (
+            task["type"] == "jsonrpc"
+            and task.get("destination_path")
+            and task["url"] == url
+            and task["name"] not in self._interupt_tasks
+        )
+
+    def _jsonrpc_run(self, position):
+        """Number of tasks from position which can be sent as one batch, a
+        task can't join the batch if its payload reads the destination_path
+        of an earlier task in it"""
+        tasks = self._task["tasks"]
+        url = tasks[position].get("url")
+        written = []
+        run = 0
+        for task in tasks[position:]:
+            if not self._is_batchable(task, url):
+                break
+            reads = [
+                jsonpath.field_keys(instruction["key"])
+                for instruction in task["payload_paths"]
+                if "key" in instruction
+            ]
+            if any(_overlaps(read, write) for read in reads for write in written):
+                break
+            written.append(jsonpath.field_keys(task["destination_path"]))
+            run += 1
+        return run
+
+    def _batch_iter(self, position, run, execution_context):
+        contexts = [execution_context] + [
+            self._execution_context.new_context(p)
+            for p in range(position + 1, position + run)
+        ]
+        with execution_context:
+            batch = JsonRpcBatch(
+                self._get_task_instance(task, context)
+                for task, context in zip(
+                    self._task["tasks"][position : position + run], contexts
+                )
+            )
+            while batch.requires_input:
+                yield batch
+            batch.tasks[0].run()
+        self._execution_context.update_state(execution_context.result)
+        for inst, context in zip(batch.tasks[1:], contexts[1:]):
+            with context:
+                inst.run()
+            self._execution_context.update_state(context.result)
+
     def _input_task_iter(
         self,
         starting_position=0,
         starting_context=None,
     ):
-
-        for position, task in enumerate(self._task["tasks"][starting_position:]):
+        tasks = self._task["tasks"]
+        position = starting_position
+        while position < len(tasks):
+            task = tasks[position]
             if starting_context is None:
                 execution_context = self._execution_context.new_context(position)
             else:
@@ -290,6 +623,12 @@ class Flow(Task):
                 execution_context = starting_context
                 starting_context = None
 
+            run = self._jsonrpc_run(position) if self._batch_jsonrpc else 0
+            if run > 1:
+                yield from self._batch_iter(position, run, execution_context)
+                position += run
+                continue
+
             with execution_context as context:
                 inst = self._get_task_instance(task, context)
                 if inst.name in self._interupt_tasks:
@@ -299,6 +638,7 @@ class Flow(Task):
                 inst.run()
             # Add task result to flow context
             self._execution_context.update_state(context.result)
+            position += 1
         self.set_as_complete()
 
     def re_init_iter(self, execution_context):
@@ -319,6 +659,8 @@ class Flow(Task):
 
 
 class WhileLoop(Flow):
+    __slots__ = ["_conditions", "_result"]
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -350,6 +692,8 @@ class WhileLoop(Flow):
 
 
 class ForLoop(Flow):
+    __slots__ = ["_result"]
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._result = []
@@ -384,10 +728,12 @@ class ForLoop(Flow):
 
 
 class Event(Task):
-    pass
+    __slots__ = []
 
 
 class Redirect(Task):
+    __slots__ = []
+
     task_type = "redirect"
 
     def run(self):
@@ -410,6 +756,8 @@ class DomainParam:
 class ClearDomainParams(Task):
     # This is another browser specific task
     # not sure how to handle this either
+    __slots__ = []
+
     task_type = "clear_domain_params"
 
 
@@ -1,25 +1,62 @@
-from jsonpath_ng import jsonpath
 import re
-from .path import evaluator
 
+from .path import CompiledPath, compile_path, evaluator
+from .utils import LRUCache
 
 jsonpath = evaluator()
 
-ANY_TEMPLATE = re.compile(r"{{.*?}}")
+ANY_TEMPLATE = re.compile(r"{{(.*?)}}")
 
 
-def process_template(template, context):
-    res = template
-    while match := ANY_TEMPLATE.search(res):
-        start_res = res
-        template_part = match.group()
-        re.sub(
-            template_part,
-            jsonpath.get_one(context=context, path=template_part.strip("{").strip("}")),
-        )
-        if start_res == res:
-            raise ValueError(
-                "Templating found patten but changed nothing "
-                "likely malformed template or context value"
+class CompiledTemplate:
+    """A template split into literal strings and compiled paths (CompiledPath)
+    so that rendering is a single pass over the tokens"""
+
+    def __init__(self, template: str):
+        self.template = template
+        self._tokens = []
+        position = 0
+        for match in ANY_TEMPLATE.finditer(template):
+            if match.start() > position:
+                self._tokens.append(template[position : match.start()])
+            self._tokens.append(compile_path(match.group(1).strip()))
+            position = match.end()
+        if position < len(template):
+            self._tokens.append(template[position:])
+
+    @property
+    def paths(self):
+        return [token for token in self._tokens if isinstance(token, CompiledPath)]
+
+    def render(self, context) -> str:
+        return "".join(
+            (
+                str(jsonpath.get_one(context=context, path=token))
+                if isinstance(token, CompiledPath)
+                else token
             )
-    return res
+            for token in self._tokens
+        )
+
+
+_templates = LRUCache(maxsize=1024)
+
+
+def compile_template(template: str) -> CompiledTemplate:
+    return _templates.get_or_create(template, CompiledTemplate)
+
+
+def template_cache_info():
+    return _templates.info()
+
+
+def process_template(template, context):
+    return compile_template(template).render(context)
+
+
+def render_templates(templates: dict, context) -> dict:
+    """Renders several templates against the same context"""
+    return {
+        name: compile_template(template).render(context)
+        for name, template in templates.items()
+    }
@@ -0,0 +1,92 @@
+"""Compact traces of a TestClient session which `replay` can re-run.
+
+A trace is the list of interactions with the session's tasks (set, click and
+JsonRpc results) along with breakpoints and the tasks returned at them.
+Each step records the hash of the task's context after it was applied so a
+replay only has to compare hashes to find where it diverged.
+"""
+
+import hashlib
+import json
+import pickle
+import zlib
+from collections import namedtuple
+
+MAGIC = b"WTCT"
+VERSION = 1
+
+TraceStep = namedtuple("TraceStep", ("task_name", "action", "args", "state_hash"))
+Trace = namedtuple("Trace", ("workflow_url", "steps"))
+
+
+class InvalidTrace(Exception):
+    pass
+
+
+def state_hash(execution_context) -> str:
+    return hashlib.blake2b(
+        json.dumps(
+            [execution_context.state, execution_context.result],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        ).encode(),
+        digest_size=8,
+    ).hexdigest()
+
+
+class Recorder:
+    def __init__(self, workflow_url):
+        self._workflow_url = workflow_url
+        self._steps = []
+
+    def _add(self, task_name, action, args=(), execution_context=None):
+        self._steps.append(
+            TraceStep(
+                task_name=task_name,
+                action=action,
+                args=tuple(args),
+                state_hash=(
+                    None if execution_context is None else state_hash(execution_context)
+                ),
+            )
+        )
+
+    def interaction(self, task, action, args):
+        self._add(task.name, action, args, task._execution_context)
+
+    def visit(self, task):
+        # Tasks which need input are returned until they're complete so only
+        # the tasks returned by breakpoints are steps
+        if task is not None and not task.requires_input:
+            self._add(task.name, "get_task", (), task._execution_context)
+
+    def breakpoint(self, task_name):
+        self._add(None, "set_task_breakpoint", (task_name,))
+
+    def trace(self) -> Trace:
+        return Trace(workflow_url=self._workflow_url, steps=tuple(self._steps))
+
+
+def dumps(trace: Trace) -> bytes:
+    return (
+        MAGIC
+        + bytes((VERSION,))
+        + zlib.compress(
+            pickle.dumps(
+                (trace.workflow_url, [tuple(step) for step in trace.steps]),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        )
+    )
+
+
+def loads(data: bytes) -> Trace:
+    if data[: len(MAGIC)] != MAGIC:
+        raise InvalidTrace("Not a session trace")
+    if data[len(MAGIC)] != VERSION:
+        raise InvalidTrace(f"Unsupported trace version {data[len(MAGIC)]}")
+    workflow_url, steps = pickle.loads(zlib.decompress(data[len(MAGIC) + 1 :]))
+    return Trace(
+        workflow_url=workflow_url, steps=tuple(TraceStep(*step) for step in steps)
+    )
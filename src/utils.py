@@ -1,4 +1,6 @@
+from collections import namedtuple, OrderedDict
 from copy import deepcopy
+from threading import Lock
 
 
 def _deepmerge(*dicts: dict) -> dict:
@@ -6,25 +8,49 @@ def _deepmerge(*dicts: dict) -> dict:
     for d in dicts[1:]:
         for key, value in d.items():
             current = result.get(key, None)
-            if isinstance(current, dict):
+            if isinstance(current, dict) and isinstance(value, dict):
                 result[key] = _deepmerge(current, value)
             else:
                 result[key] = value
     return result
 
 
+def _sharedmerge(a: dict, b: dict) -> dict:
+    result = dict(a)
+    for key, value in b.items():
+        current = result.get(key, None)
+        if isinstance(current, dict) and isinstance(value, dict):
+            result[key] = _sharedmerge(current, value)
+        else:
+            result[key] = value
+    return result
+
+
 def deepmerge(*dicts: dict) -> dict:
     """Returns a merge of the nested dicts with the
-    later dict overwritting the newer
+    later dict overwritting the earlier. None of the inputs are modified,
+    only the dicts along changed paths are copied, all other values are
+    shared with the inputs
     ```
     >>> A = {"x": 1, "z": 4}
-    >>> A = {"x": 2, "y": 3}
-    >>> merge_stat(A, B)
+    >>> B = {"x": 2, "y": 3}
+    >>> deepmerge(A, B)
     {"x": 2, "y": 3, "z": 4}
+    ```
+    """
+    result = dicts[0]
+    for d in dicts[1:]:
+        result = _sharedmerge(result, d)
+    if len(dicts) == 1:
+        result = dict(result)
+    return result
 
 
+def deepmerge_into(target: dict, *dicts: dict) -> dict:
+    """In-place variant of deepmerge for callers which own target,
+    target (and any nested dicts within it) are updated and returned
     """
-    return _deepmerge(*map(deepcopy, dicts))
+    return _deepmerge(target, *dicts)
 
 
 def _deepdiff(a: dict, b: dict) -> dict:
@@ -47,8 +73,73 @@ def deepdiff(a: dict, b: dict) -> dict:
     ```
     >>> A = {"x": 1, "y": 3, "z": 4}
     >>> B = {"x": 2, "y": 3, "w": 5}
-    >>> diff_strat(A, B)
+    >>> deepdiff(A, B)
     {"x": 1, "z": 4}
     ```
     """
-    return _deepmerge(deepcopy(a), deepcopy(b))
+    if not b:
+        return deepcopy(a)
+    return deepcopy(_deepdiff(a, b))
+
+
+CacheInfo = namedtuple(
+    "CacheInfo", ("hits", "misses", "evictions", "maxsize", "currsize")
+)
+
+
+class LRUCache:
+    """Bounded, thread-safe least recently used cache with hit/miss/eviction
+    counters"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        # Create outside of the lock, at worst two threads create the same value
+        value = factory(key)
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self._evict()
+        return value
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                maxsize=self.maxsize,
+                currsize=len(self._items),
+            )
@@ -1,16 +1,94 @@
+from collections import namedtuple
 from typing import Any
 from .path import evaluator
 from .templating import process_template
+from .utils import LRUCache
 
 jsonpath = evaluator()
 
+ValidationCacheInfo = namedtuple("ValidationCacheInfo", ("hits", "misses"))
+
+_NO_RESULT = object()
+
+
+def _state_at(context, keys):
+    # Returns the value at the keys or, if it is missing, the deepest
+    # container found along the way as adding the key would replace it
+    node = context
+    for key in keys:
+        if not isinstance(node, dict) or key not in node:
+            break
+        node = node[key]
+    return node
+
+
+class ValidatorSpec:
+    # The parsed, shareable part of a validator. Every validator built from
+    # the same config uses the same spec so the name handling and dependency
+    # keys are only worked out once.
+    __slots__ = ["config", "dependency_keys"]
+
+    def __init__(self, validator_name, config):
+        if config.get("name") != validator_name:
+            # Compiled workflows have the name set already
+            config = config | {"name": validator_name}
+        self.config = config
+        keys = []
+        for path_key in ("value_path", "validator_key"):
+            if path := config.get(path_key):
+                # Paths which aren't simple key lookups depend on all the state
+                keys.append(jsonpath.field_keys(path) or ())
+        self.dependency_keys = tuple(keys)
+
+
+class _SpecCache(LRUCache):
+    # Keyed on the identity of the repo config. The spec may hold a copy of
+    # the config (with the name added) so the entry also holds the original,
+    # otherwise once it was freed its id could be reused by another config
+    # which would be given this spec
+    def get(self, validator_name, config):
+        original, spec = self.get_or_create(
+            (validator_name, id(config)),
+            lambda key: (config, ValidatorSpec(validator_name, config)),
+        )
+        return spec
+
+
+_specs = _SpecCache(maxsize=4096)
+
+
+def get_spec(validator_name, repos) -> ValidatorSpec:
+    return _specs.get(validator_name, repos.validators[validator_name])
+
 
 class Validator:
+    # Validation results are cached against the parts of the state they read.
+    # State is frozen and updates only replace the containers along the
+    # updated paths so if the values at those paths are the same objects as
+    # last time nothing the validator depends on has changed.
+    __slots__ = [
+        "_execution_context",
+        "_component",
+        "_spec",
+        "_cached_dependencies",
+        "_cached_value",
+        "_cached_result",
+    ]
+
+    cache_hits = 0
+    cache_misses = 0
+
     def __init__(self, validator_name, execution_context, component=None):
         self._execution_context = execution_context
         self._component = component
-        self._config = self._execution_context.repos.validators[validator_name]
-        self._config["name"] = validator_name
+        self._cached_dependencies = ()
+        self._cached_value = None
+        self._cached_result = _NO_RESULT
+        self._spec = get_spec(validator_name, execution_context.repos)
+
+    @property
+    def _config(self):
+        return self._spec.config
 
     def _get_value(self, context: dict, component):
         if self._config.get("value_path"):
@@ -28,17 +106,55 @@ class Validator:
         func = VALIDATORS[self._config["type"]]
         return func(value, validator_value)
 
+    @classmethod
+    def cache_info(cls) -> ValidationCacheInfo:
+        return ValidationCacheInfo(hits=cls.cache_hits, misses=cls.cache_misses)
+
+    def _get_dependency_keys(self):
+        return self._spec.dependency_keys
+
+    def _is_cached(self, dependencies, component_value):
+        return (
+            self._cached_result is not _NO_RESULT
+            and all(a is b for a, b in zip(dependencies, self._cached_dependencies))
+            and (
+                component_value is self._cached_value
+                or component_value == self._cached_value
+            )
+        )
+
     def validate(self):
         context = self._execution_context.state
         component = self._component
-        return self._validate(
+        dependencies = tuple(
+            _state_at(context, keys) for keys in self._get_dependency_keys()
+        )
+        component_value = (
+            component.get_value()
+            if component is not None and not self._config.get("value_path")
+            else None
+        )
+        if self._is_cached(dependencies, component_value):
+            Validator.cache_hits += 1
+            return self._cached_result
+
+        Validator.cache_misses += 1
+        result = self._validate(
             value=self._get_value(context=context, component=component),
             validator_value=self._get_validator_value(context=context),
         )
+        self._cached_dependencies = dependencies
+        self._cached_value = component_value
+        self._cached_result = result
+        return result
+
+    @property
+    def message_template(self) -> str:
+        return self._config["message"]["template"]
 
     def get_message(self):
         return process_template(
-            template=self._config["message"]["template"],
+            template=self.message_template,
             context=self._execution_context.state,
         )
 